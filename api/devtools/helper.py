@@ -6,12 +6,41 @@ All functions are documented for clarity and maintainability.
 """
 
 from pathlib import Path
+from functools import cached_property, lru_cache
 import json
+import os
 import re
-from typing import Any, Dict, List, Optional, Tuple
-from collections import OrderedDict
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 import json5
-from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, meta
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+# jinja2 is imported by load_jinja_template, the schema scripts do not need it
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional, stdlib json is used as fallback
+    orjson = None
+
+try:
+    import pyjson5 as _native_json5
+except ImportError:  # pragma: no cover - optional compiled JSON5 parser, the pure Python json5 is used as fallback
+    _native_json5 = json5
+
+
+@lru_cache(maxsize=None)
+def _parse_config_file(path: str, mtime_ns: int) -> Dict[str, Any]:  # pylint: disable=unused-argument
+    """Parse a JSON5 config file; cached per path and modification time, the result is shared and must not be modified."""
+    data = Path(path).read_bytes()
+    # most configs are strict JSON, the C parsers are much faster than the pure Python json5 parser
+    try:
+        if orjson is not None:
+            return orjson.loads(data)  # pylint: disable=no-member
+        return json.loads(data)
+    except ValueError:
+        return _native_json5.loads(data.decode('utf-8'))
 
 
 class Config:
@@ -29,9 +58,31 @@ class Config:
             config_dict (Dict[str, Any]): The configuration dictionary loaded from file.
         """
         self._config = config_dict
-        self.paths = config_dict.get('paths', {})
-        self.lambdas = config_dict.get('lambdas', [])
-        self.modelsources = config_dict.get('modelsources', {})
+
+    # the sections are looked up on first access and then stored on the instance
+
+    @cached_property
+    def paths(self) -> Dict[str, Any]:
+        """The paths section of the config."""
+        return self._config.get('paths', {})
+
+    @cached_property
+    def lambdas(self) -> Dict[str, Any]:
+        """The lambdas section of the config."""
+        return self._config.get('lambdas', [])
+
+    @cached_property
+    def modelsources(self) -> Dict[str, Any]:
+        """The modelsources section of the config."""
+        return self._config.get('modelsources', {})
+
+    @cached_property
+    def _lambda_by_name(self) -> Dict[Any, Dict[str, Any]]:
+        """Lambda function configs by tag_name; the first function wins, like a linear search would."""
+        lambda_by_name: Dict[Any, Dict[str, Any]] = {}
+        for func in self.get_lambda_functions() or []:
+            lambda_by_name.setdefault(func.get("tag_name"), func)
+        return lambda_by_name
 
     @classmethod
     def load(cls, filename: str) -> 'Config':
@@ -48,9 +99,7 @@ class Config:
         """
         config_file = Path(__file__).parent / filename
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_dict = json5.load(f)
-            return cls(config_dict)
+            return cls(_parse_config_file(str(config_file), config_file.stat().st_mtime_ns))
         except FileNotFoundError as e:
             raise FileNotFoundError(f"Configuration file not found: {config_file}") from e
         except Exception as e:
@@ -98,13 +147,9 @@ class Config:
         Args:
             tag_name (str): The tag name of the lambda function.
         Returns:
-            Optional[Dict[str, Any]]: The lambda function config, or None if not found.
+            Optional[Dict[str, Any]]: The lambda function config (shared, must not be modified), or None if not found.
         """
-        all_funcs = self.get_lambda_functions() or {}
-        for func in all_funcs:
-            if func.get("tag_name") == tag_name:
-                return func.copy()
-        return None
+        return self._lambda_by_name.get(tag_name)
 
     def get_modelsource(self, source_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -127,158 +172,215 @@ class Config:
         return list(self.modelsources.values())
 
 
-def update_refs(obj: Any) -> None:
-    """
-    Recursively update $ref links in a schema object to OpenAPI 3.x style.
+@lru_cache(maxsize=None)
+def _yaml_backend() -> Tuple[Any, Any, Any]:
+    """Import yaml on first use; prefers the libyaml C loader/dumper over the pure Python ones."""
+    import yaml  # pylint: disable=import-outside-toplevel
+    return yaml, getattr(yaml, "CSafeLoader", yaml.SafeLoader), getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
-    Args:
-        obj (Any): The schema object (dict or list) to update in-place.
-    """
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            if k == "$ref" and isinstance(v, str):
-                if v.startswith("#/$defs/"):
-                    obj[k] = v.replace("#/$defs/", "#/components/schemas/")
-                elif "/#/" in v:
-                    # External file with local pointer: extract after last '#/'
-                    target = v.split("#/")[-1]
-                    obj[k] = f"#/components/schemas/{target}"
-                # Fallback (e.g. ./schemas/..., but without #/)
-                elif v.startswith("./schemas/"):
-                    parts = v.split("#/components/schemas/")
-                    if len(parts) == 2:
-                        obj[k] = f"#/components/schemas/{parts[1]}"
-            elif isinstance(v, str) and v.startswith("#/$defs/"):
-                obj[k] = v.replace("#/$defs/", "#/components/schemas/")
-            else:
-                update_refs(v)
-    elif isinstance(obj, list):
-        for item in obj:
-            update_refs(item)
-
-
-def patch_const_to_enum(schema: Any):
-    """
-    Recursively replace 'const' nodes with equivalent 'enum' nodes for OpenAPI 3.0 compatibility.
+
+def load_yaml(stream: Any) -> Any:
+    """
+    Load a YAML document with the safe loader.
 
     Args:
-        schema (Any): The schema object to patch.
+        stream (Any): Open file or string to parse.
+    Returns:
+        Any: The parsed document.
     """
-    if isinstance(schema, dict):
-        if "const" in schema:
-            schema["enum"] = [schema.pop("const")]
-        for val in schema.values():
-            patch_const_to_enum(val)
-    elif isinstance(schema, list):
-        for item in schema:
-            patch_const_to_enum(item)
+    yaml, loader, _ = _yaml_backend()
+    return yaml.load(stream, Loader=loader)  # nosec B506 - safe loader
 
 
-def fix_nullable_fields_deep(schema: Any):
+def dump_yaml(data: Any, stream: Any = None, **kwargs) -> Any:
     """
-    Recursively patch nullable fields to conform to OpenAPI.
+    Dump data as YAML with the safe dumper.
 
     Args:
-        schema (Any): The schema object to patch.
+        data (Any): The object to serialize.
+        stream (Any): Optional open file, if None the YAML is returned as string.
+        **kwargs: Further options for yaml.dump.
+    Returns:
+        Any: The YAML string if no stream was given, else None.
     """
-    if isinstance(schema, dict):
-        for key in list(schema.keys()):
-            if key not in schema:
-                continue
+    yaml, _, dumper = _yaml_backend()
+    return yaml.dump(data, stream, Dumper=dumper, **kwargs)
+
+
+# strings matching this (and not a YAML 1.1 bool/null word) can be written unquoted
+_YAML_PLAIN_RE = re.compile(r"[A-Za-z_$/][A-Za-z0-9_ .,/$()'-]*")
+_YAML_RESERVED_WORDS = frozenset({"y", "n", "yes", "no", "true", "false", "on", "off", "null"})
+# printable ASCII can always be written single quoted
+_YAML_SINGLE_QUOTABLE_RE = re.compile(r"[\x20-\x7e]*")
+# characters YAML treats as line breaks or does not allow unescaped in double quoted scalars
+_YAML_ESCAPE_RE = re.compile("[\x7f-\x9f\u2028\u2029\ufeff\ufffe\uffff]")
+
+
+def _yaml_string(value: str) -> str:
+    """Format a string for dump_openapi_yaml; it is only quoted when a plain scalar would be read back differently."""
+    if _YAML_PLAIN_RE.fullmatch(value) and not value.endswith(" ") and value.lower() not in _YAML_RESERVED_WORDS:
+        return value
+    if _YAML_SINGLE_QUOTABLE_RE.fullmatch(value):
+        return "'" + value.replace("'", "''") + "'"
+    # JSON string escapes are valid in YAML double quoted scalars
+    return _YAML_ESCAPE_RE.sub(lambda m: f"\\u{ord(m.group()):04x}", json.dumps(value, ensure_ascii=False))
+
+
+def _yaml_float(value: float) -> str:
+    """Format a float the way YAML 1.1 resolves it back to a float."""
+    if value != value:  # pylint: disable=comparison-with-itself
+        return ".nan"
+    if value in (float("inf"), float("-inf")):
+        return ".inf" if value > 0 else "-.inf"
+    text = repr(value)
+    # YAML 1.1 floats need a dot, e.g. 1e-05 -> 1.0e-05
+    return text if "." in text else text.replace("e", ".0e", 1)
+
+
+def _yaml_scalar(value: Any) -> str:
+    """Format a scalar (or an empty dict/list) for dump_openapi_yaml."""
+    if isinstance(value, str):
+        return _yaml_string(value)
+    if value is None or isinstance(value, bool):
+        return {None: "null", True: "true", False: "false"}[value]
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _yaml_float(value)
+    if isinstance(value, (dict, list)):
+        return "{}" if isinstance(value, dict) else "[]"
+    raise TypeError(f"Cannot write {type(value).__name__} as YAML")
+
+
+def _write_yaml_value(value: Any, f: Any, pad: str, sort_keys: bool):
+    """Write the value of a mapping entry (the key is already written), nested blocks are indented below pad."""
+    if isinstance(value, dict) and value:
+        f.write("\n")
+        _write_yaml_mapping(value, f, pad + "  ", sort_keys)
+    elif isinstance(value, list) and value:
+        f.write("\n")
+        _write_yaml_sequence(value, f, pad, sort_keys)
+    else:
+        f.write(f" {_yaml_scalar(value)}\n")
+
+
+def _write_yaml_mapping(mapping: dict, f: Any, pad: str, sort_keys: bool):
+    """Write a non-empty mapping in block style, one key per line at pad."""
+    for key, value in (sorted(mapping.items()) if sort_keys else mapping.items()):
+        f.write(f"{pad}{_yaml_scalar(key)}:")
+        _write_yaml_value(value, f, pad, sort_keys)
+
+
+def _write_yaml_sequence(items: list, f: Any, pad: str, sort_keys: bool):
+    """Write a non-empty sequence in block style, items start with '- ' at pad."""
+    for item in items:
+        f.write(f"{pad}-")
+        if isinstance(item, dict) and item:
+            # first key goes on the dash line, the others are aligned below it
+            key_pad = " "
+            for key, value in (sorted(item.items()) if sort_keys else item.items()):
+                f.write(f"{key_pad}{_yaml_scalar(key)}:")
+                _write_yaml_value(value, f, pad + "  ", sort_keys)
+                key_pad = pad + "  "
+        elif isinstance(item, list) and item:
+            f.write("\n")
+            _write_yaml_sequence(item, f, pad + "  ", sort_keys)
+        else:
+            f.write(f" {_yaml_scalar(item)}\n")
+
+
+def dump_openapi_yaml(data: Any, f: Any, indent: int = 0, sort_keys: bool = False):
+    """
+    Write data as block style YAML without going through the yaml emitter.
 
-            value = schema[key]
+    Only covers what the generated OpenAPI files contain: dicts, lists, str, int, float, bool and None.
+    Strings are quoted only where needed.
+
+    Args:
+        data (Any): The object to serialize.
+        f (Any): Open text file to write to.
+        indent (int): Indentation of the top level keys.
+        sort_keys (bool): Write mapping keys sorted instead of in insertion order.
+    """
+    if isinstance(data, dict) and data:
+        _write_yaml_mapping(data, f, " " * indent, sort_keys)
+    elif isinstance(data, list) and data:
+        _write_yaml_sequence(data, f, " " * indent, sort_keys)
+    else:
+        f.write(f"{' ' * indent}{_yaml_scalar(data)}\n")
 
-            if key == "nullable" and value is True:
-                schema.clear()
-                schema["type"] = "object"
-                schema["nullable"] = True
-                continue
 
-            if isinstance(value, (dict, list)):
-                fix_nullable_fields_deep(value)
-    elif isinstance(schema, list):
-        for item in schema:
-            fix_nullable_fields_deep(item)
+_DEFS_PREFIX = "#/$defs/"
+_DEFS_PREFIX_LEN = len(_DEFS_PREFIX)
+_COMPONENTS_PREFIX = "#/components/schemas/"
 
 
-def patch_anyof_nullables(schema: Any) -> None:
+@lru_cache(maxsize=None)
+def _openapi_ref(ref: str) -> str:
     """
-    Convert 'anyOf': [A, {"type": "null"}] to A + 'nullable: true' recursively (OpenAPI 3.0).
+    Return the OpenAPI 3.x form of a $ref value, unknown forms are returned unchanged.
 
-    Args:
-        schema (Any): The schema object to patch.
+    Memoized, a schema reuses the same few hundred ref strings all over the tree.
     """
-    if isinstance(schema, dict):
-        for key, value in list(schema.items()):
-            # Patch anyOf: [foo, {"type": "null"}]
-            if key == "anyOf" and isinstance(value, list) and len(value) == 2:
-                if isinstance(value[0], dict) and value[1] == {"type": "null"}:
-                    for k, v in value[0].items():
-                        schema[k] = v
-                    schema["nullable"] = True
-                    del schema["anyOf"]
-                elif value[0] == {"type": "null"} and isinstance(value[1], dict):
-                    for k, v in value[1].items():
-                        schema[k] = v
-                    schema["nullable"] = True
-                    del schema["anyOf"]
-            else:
-                patch_anyof_nullables(value)
-    elif isinstance(schema, list):
-        for item in schema:
-            patch_anyof_nullables(item)
-
-
-def dictify(obj: Any) -> Any:
-    """
-    Recursively convert OrderedDict/list to dict/list.
+    if ref.startswith(_DEFS_PREFIX):
+        return _COMPONENTS_PREFIX + ref[_DEFS_PREFIX_LEN:]
+    if "/#/" in ref:
+        # External file with local pointer: extract after last '#/'
+        return _COMPONENTS_PREFIX + ref.rpartition("#/")[2]
+    # Fallback (e.g. ./schemas/..., but without #/)
+    if ref.startswith("./schemas/"):
+        parts = ref.split(_COMPONENTS_PREFIX)
+        if len(parts) == 2:
+            return f"{_COMPONENTS_PREFIX}{parts[1]}"
+    return ref
+
+
+def append_node_schema_refs(node: dict, refs: List[str]):
+    """
+    Append the schema references of a single dict node, as collected by extract_schema_refs.
+
+    Covers the node's own $ref and its 'schema' entry ($ref, oneOf items and discriminator mapping); children are not visited.
 
     Args:
-        obj (Any): The object to convert.
-    Returns:
-        Any: The converted object.
+        node (dict): The node to inspect.
+        refs (List[str]): List the found references are appended to.
     """
-    if isinstance(obj, OrderedDict):
-        return {k: dictify(v) for k, v in sorted(obj.items())}
-    if isinstance(obj, dict):
-        return {k: dictify(v) for k, v in sorted(obj.items())}
-    if isinstance(obj, list):
-        return [dictify(i) for i in obj]
-    return obj
+    if "$ref" in node:
+        refs.append(node["$ref"])
+    schema = node.get("schema")
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            refs.append(schema["$ref"])
+        for one_of_item in schema.get("oneOf", []):
+            if isinstance(one_of_item, dict) and "$ref" in one_of_item:
+                refs.append(one_of_item["$ref"])
+        discriminator = schema.get("discriminator", {})
+        for disc_ref in discriminator.get("mapping", {}).values():
+            refs.append(disc_ref)
 
 
-def extract_schema_refs(obj: Any, context: str = "") -> List[str]:
+def extract_schema_refs(obj: Any) -> List[str]:
     """
-    Extract all $ref references from request/response objects recursively.
+    Extract all $ref references from request/response objects.
+
+    Refs are returned in document order.
 
     Args:
         obj (Any): The object to search for $ref.
-        context (str): Optional context for debugging.
     Returns:
         List[str]: List of all $ref strings found.
     """
     refs: List[str] = []
+    stack = [obj]
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            append_node_schema_refs(node, refs)
+            stack.extend(reversed([value for value in node.values() if isinstance(value, (dict, list))]))
 
-    if isinstance(obj, dict):
-        if "$ref" in obj:
-            refs.append(obj["$ref"])
-        schema = obj.get("schema")
-        if isinstance(schema, dict):
-            if "$ref" in schema:
-                refs.append(schema["$ref"])
-            for one_of_item in schema.get("oneOf", []):
-                if isinstance(one_of_item, dict) and "$ref" in one_of_item:
-                    refs.append(one_of_item["$ref"])
-            discriminator = schema.get("discriminator", {})
-            for disc_ref in discriminator.get("mapping", {}).values():
-                refs.append(disc_ref)
-
-        for key, value in obj.items():
-            refs.extend(extract_schema_refs(value, f"{context}.{key}"))
-
-    elif isinstance(obj, list):
-        for i, item in enumerate(obj):
-            refs.extend(extract_schema_refs(item, f"{context}[{i}]"))
+        elif isinstance(node, list):
+            stack.extend(reversed([item for item in node if isinstance(item, (dict, list))]))
 
     return refs
 
@@ -298,17 +400,25 @@ def validation_error_printer(ve: Any) -> None:
     else:
         message = str(ve)
 
+    instance = str(getattr(ve, 'instance', None))
     error_dict = {
-        "message": json.dumps(message, indent=2),
+        "message": message,
         "validator": getattr(ve, 'validator', None),
         "validator_value": getattr(ve, 'validator_value', None),
         "absolute_path": list(getattr(ve, 'absolute_path', [])),
-        "instance": str(getattr(ve, 'instance', None))[:500] + "..." if len(str(getattr(ve, 'instance', None))) > 500 else str(getattr(ve, 'instance', None))
+        "instance": instance[:500] + "..." if len(instance) > 500 else instance
     }
 
+    if orjson is not None:
+        # validator values can hold non-string keys and arbitrary objects, those are printed with str()
+        print(orjson.dumps(error_dict, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str).decode())  # pylint: disable=no-member
+        return
     print(json.dumps(error_dict, indent=2, ensure_ascii=False))
 
 
+_SNAKE_CASE_RE = re.compile(r'(?<!^)(?=[A-Z])')
+
+
 def to_snake_case(value: str) -> str:
     """
     Convert a string to snake_case.
@@ -318,22 +428,44 @@ def to_snake_case(value: str) -> str:
     Returns:
         str: The snake_case version of the string.
     """
-    return re.sub(r'(?<!^)(?=[A-Z])', '_', value).lower()
+    return _SNAKE_CASE_RE.sub('_', value).lower()
+
+
+JINJA_BYTECODE_CACHE_DIR = Path(__file__).parent / ".jinja_cache"
+
+
+@lru_cache(maxsize=None)
+def _jinja_environment(template_dir: str) -> "Environment":
+    """
+    Create the Jinja2 Environment for a template directory; cached, so its template cache is shared by all loads.
+
+    Compiled templates are also kept in JINJA_BYTECODE_CACHE_DIR, so later runs skip parsing and compiling unchanged templates.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined  # pylint: disable=import-outside-toplevel
+    JINJA_BYTECODE_CACHE_DIR.mkdir(exist_ok=True)
+    env = Environment(loader=FileSystemLoader(template_dir), undefined=StrictUndefined, autoescape=True,
+                      bytecode_cache=FileSystemBytecodeCache(str(JINJA_BYTECODE_CACHE_DIR)))
+    env.filters['snake_case'] = to_snake_case
+    return env
 
 
-def load_jinja_template(template_name: str, template_dir: str) -> Tuple[Template, dict]:
+@lru_cache(maxsize=None)
+def load_jinja_template(template_name: str, template_dir: str) -> Tuple["Template", dict]:
     """
     Load a Jinja2 template from the given directory and return Template + expected variables dict.
 
+    Results are cached per (template_name, template_dir), so each template is parsed and compiled only once.
+    The returned dict is shared between callers and must not be modified.
+
     Args:
         template_name (str): The template filename.
         template_dir (str): The directory containing the template.
     Returns:
         Tuple[Template, dict]: The loaded template and a dict of expected variables.
     """
-    env = Environment(loader=FileSystemLoader(template_dir), undefined=StrictUndefined, autoescape=True)
-    env.filters['snake_case'] = to_snake_case
-    template: Template = env.get_template(template_name)
+    from jinja2 import meta  # pylint: disable=import-outside-toplevel
+    env = _jinja_environment(template_dir)
+    template: "Template" = env.get_template(template_name)
     expected_vars = {}
     if env.loader:
         template_source = env.loader.get_source(env, template_name)[0]
@@ -343,7 +475,7 @@ def load_jinja_template(template_name: str, template_dir: str) -> Tuple[Template
     return template, expected_vars
 
 
-def render_jinja_template(template: Template, **kwargs) -> str:
+def render_jinja_template(template: "Template", **kwargs) -> str:
     """
     Render a Jinja2 template with the provided variables.
 
@@ -356,20 +488,112 @@ def render_jinja_template(template: Template, **kwargs) -> str:
     return template.render(**kwargs)
 
 
-def patch_schema_all(schema_dict: Any) -> Any:
+_NULL_SCHEMA = {"type": "null"}
+# keywords repeated in nearly every schema node, mapped to one interned instance each for the copies built below
+_SCHEMA_KEYWORDS = {key: sys.intern(key) for key in (
+    "$ref", "type", "properties", "required", "items", "description", "title", "nullable", "enum", "format", "default",
+    "anyOf", "oneOf", "allOf", "discriminator", "mapping", "propertyName", "additionalProperties", "schema", "content",
+    "responses", "requestBody", "parameters", "in", "name", "summary", "operationId", "tags", "example", "examples",
+)}
+
+
+def _patch_node(node: dict) -> bool:
+    """
+    Patch a single dict in place: 'const' becomes a one-value 'enum', $ref values get their OpenAPI 3.x form
+    (see _openapi_ref) and a node with 'nullable: true' is replaced by a nullable object stub.
+
+    Returns True if the node was replaced by the nullable object stub.
+    """
+    if "const" in node:
+        node["enum"] = [node.pop("const")]
+    for k, v in node.items():
+        if isinstance(v, str):
+            # $defs pointers are the common case and rewritten the same way for every key, only $ref has other forms
+            if v.startswith(_DEFS_PREFIX):
+                node[k] = _COMPONENTS_PREFIX + v[_DEFS_PREFIX_LEN:]
+            elif k == "$ref":
+                node[k] = _openapi_ref(v)
+    if node.get("nullable") is True:
+        node.clear()
+        node["type"] = "object"
+        node["nullable"] = True
+        return True
+    return False
+
+
+def _merge_anyof_nullable(node: dict) -> Optional[set]:
+    """
+    Merge 'anyOf': [A, {"type": "null"}] into node as A + 'nullable: true' (OpenAPI 3.0).
+
+    Returns the keys taken over from A (they are not anyOf-patched any further), None if nothing was merged.
+    """
+    value = node.get("anyOf")
+    if not isinstance(value, list) or len(value) != 2:
+        return None
+    for item in value:
+        if isinstance(item, dict):
+            _patch_node(item)
+    if isinstance(value[0], dict) and value[1] == _NULL_SCHEMA:
+        merged = value[0]
+    elif value[0] == _NULL_SCHEMA and isinstance(value[1], dict):
+        merged = value[1]
+    else:
+        return None
+    node.update(merged)
+    node["nullable"] = True
+    del node["anyOf"]
+    return set(merged)
+
+
+def patch_schema_all(schema_dict: Any, sorted_copy: bool = True) -> Any:
     """
     Call all patch functions on the schema dict to ensure OpenAPI 3.x compatibility.
 
+    Applies _patch_node and _merge_anyof_nullable to every node in one walk with
+    an explicit stack: every node is patched in place and copied with sorted keys into the result.
+    Nodes are dispatched on their exact type, the loaders and pydantic only produce plain dicts and lists.
+
     Args:
         schema_dict (Any): The schema dictionary to patch.
+        sorted_copy (bool): If False, only patch in place and return schema_dict unsorted (no sorted copy),
+            e.g. when the writer sorts the keys itself.
     Returns:
         Any: The patched and dictified schema.
     """
-    patch_const_to_enum(schema_dict)
-    update_refs(schema_dict)
-    fix_nullable_fields_deep(schema_dict)
-    patch_anyof_nullables(schema_dict)
-    return dictify(schema_dict)
+    result = [None]
+    # (source node, anyOf patching enabled, target container or None without copy, target key)
+    stack: List[Tuple[Any, bool, Any, Any]] = [(schema_dict, True, result if sorted_copy else None, 0)]
+    while stack:
+        node, patch_anyof, target, target_key = stack.pop()
+        node_type = type(node)
+        if node_type is dict:
+            if _patch_node(node):
+                if target is not None:
+                    target[target_key] = {"nullable": True, "type": "object"}
+                continue
+            # anyOf lists of two are never anyOf-patched themselves, neither are keys merged from them
+            skip_anyof = {"anyOf"} if patch_anyof and isinstance(node.get("anyOf"), list) and len(node["anyOf"]) == 2 else set()
+            if patch_anyof:
+                skip_anyof |= _merge_anyof_nullable(node) or set()
+            if target is None:
+                stack.extend((value, patch_anyof and key not in skip_anyof, None, None) for key, value in node.items() if type(value) in (dict, list))
+                continue
+            # scalars are copied with the container, nested containers replace their slot once copied
+            copy = target[target_key] = {_SCHEMA_KEYWORDS.get(key, key): value for key, value in sorted(node.items())}
+            stack.extend((value, patch_anyof and key not in skip_anyof, copy, key) for key, value in copy.items() if type(value) in (dict, list))
+        elif node_type is list:
+            if target is None:
+                stack.extend((item, patch_anyof, None, None) for item in node if type(item) in (dict, list))
+                continue
+            copy = target[target_key] = list(node)
+            stack.extend((item, patch_anyof, copy, i) for i, item in enumerate(node) if type(item) in (dict, list))
+        elif target is not None:
+            target[target_key] = node  # only reached for a scalar root
+    return result[0] if sorted_copy else schema_dict
+
+
+# a whole marker line: indent, BEGIN or END, block name; the indent must not span lines
+_USER_CODE_MARKER_RE = re.compile(r"^([^\S\n]*)# -- (BEGIN|END) USER CODE: (\w+) --.*\n?", re.MULTILINE)
 
 
 def extract_user_code_blocks(filepath: Path) -> Dict[str, str]:
@@ -378,33 +602,33 @@ def extract_user_code_blocks(filepath: Path) -> Dict[str, str]:
     Returns a dict: {method_name: (indent, user_code_str)}
     """
     user_blocks = {}
-    if not filepath.exists():
+    try:
+        text = filepath.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return user_blocks
+    # the open block, a new BEGIN restarts it
     current_method = None
-    current_lines = []
     current_indent = ''
-    inside_block = False
-    for line in filepath.read_text(encoding="utf-8").splitlines(keepends=True):
-        begin_match = re.match(r"^(\s*)# -- BEGIN USER CODE: (\w+) --", line)
-        end_match = re.match(r"^(\s*)# -- END USER CODE: (\w+) --", line)
-        if begin_match:
-            inside_block = True
-            current_method = begin_match.group(2)
-            current_indent = begin_match.group(1)
-            current_lines = []
-            continue
-        if end_match and inside_block and current_method == end_match.group(2):
-            user_blocks[current_method] = (current_indent, ''.join(current_lines))
-            inside_block = False
+    content_start = 0
+    for marker in _USER_CODE_MARKER_RE.finditer(text):
+        indent, kind, method = marker.groups()
+        if kind == "BEGIN":
+            current_method, current_indent, content_start = method, indent, marker.end()
+        elif current_method == method:
+            # the content is sliced from the text, from after the BEGIN line up to the END line
+            user_blocks[method] = (current_indent, text[content_start:marker.start()])
             current_method = None
-            current_lines = []
-            current_indent = ''
-            continue
-        if inside_block:
-            current_lines.append(line)
     return user_blocks
 
 
+_USER_CODE_BLOCK_RE = re.compile(r"^(\s*)# -- BEGIN USER CODE: (\w+) --.*?^\1# -- END USER CODE: \2 --", re.DOTALL | re.MULTILINE)
+
+
+def _reindent_user_code(user_code: str, indent: str) -> str:
+    """Put every non-blank line of a user code block at the given indent."""
+    return ''.join([indent + line.lstrip() if line.strip() else line for line in user_code.splitlines(keepends=True)])
+
+
 def inject_user_code(rendered: str, user_blocks: Dict[str, tuple]) -> str:
     """
     Replace the default user code blocks in the rendered template with the user's code.
@@ -414,38 +638,128 @@ def inject_user_code(rendered: str, user_blocks: Dict[str, tuple]) -> str:
     used_blocks = set()
 
     def replacer(match):
-        indent = match.group(1)
-        method = match.group(2)
+        indent, method = match.groups()
         block_content = match.group(0)
         if method in user_blocks:
-            _, user_code = user_blocks[method]
+            used_blocks.add(method)
             # Einheitliche Prüfung für alle Blöcke
             if '# DEFAULT USER CODE:' in block_content:
-                used_blocks.add(method)
                 # Re-indent user code to match current block
-                user_code_lines = user_code.splitlines(keepends=True)
-                reindented = ''.join([indent + line.lstrip() if line.strip() else line for line in user_code_lines])
-                return f"{indent}# -- BEGIN USER CODE: {method} --\n" + reindented + f"{indent}# -- END USER CODE: {method} --"
-            used_blocks.add(method)
-            return block_content
+                reindented = _reindent_user_code(user_blocks[method][1], indent)
+                return f"{indent}# -- BEGIN USER CODE: {method} --\n{reindented}{indent}# -- END USER CODE: {method} --"
         return block_content
 
-    pattern = re.compile(r"^(\s*)# -- BEGIN USER CODE: (\w+) --.*?^\1# -- END USER CODE: \2 --", re.DOTALL | re.MULTILINE)
-    result = pattern.sub(replacer, rendered)
+    result = _USER_CODE_BLOCK_RE.sub(replacer, rendered)
     # Füge nicht verwendete User-Blocks am Ende an
     unused_blocks = [m for m in user_blocks if m not in used_blocks]
     if unused_blocks:
         result += "\n\n# --- Unmatched user code blocks from previous version ---\n"
         for m in unused_blocks:
             indent, user_code = user_blocks[m]
-            user_code_lines = user_code.splitlines(keepends=True)
-            reindented = ''.join([indent + line.lstrip() if line.strip() else line for line in user_code_lines])
-            result += f"{indent}# -- BEGIN USER CODE: {m} --\n" + reindented + f"{indent}# -- END USER CODE: {m} --\n"
+            result += f"{indent}# -- BEGIN USER CODE: {m} --\n{_reindent_user_code(user_code, indent)}{indent}# -- END USER CODE: {m} --\n"
     return result
 
 
+# directories already created by the writers below, generators write many files into the same few directories
+_CREATED_DIRS: Set[Path] = set()
+
+
+def _ensure_parent_dir(path: Path):
+    """Create the parent directory of path, at most once per process."""
+    parent = path.parent
+    if parent not in _CREATED_DIRS:
+        parent.mkdir(parents=True, exist_ok=True)
+        _CREATED_DIRS.add(parent)
+
+
+# like open(path, "wb"): permissions from the umask, no newline translation on Windows
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
 def write_output_file(path: Path, content: str):
-    """Write content to a file, creating parent directories if needed."""
-    path.parent.mkdir(parents=True, exist_ok=True)
+    """Write content to a file as UTF-8, creating parent directories if needed."""
+    _ensure_parent_dir(path)
+    # encoded once and written with a raw file descriptor, no text or buffer layer is needed for a single write
+    data = memoryview(content.encode("utf-8"))
+    fd = os.open(path, _WRITE_FLAGS, 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+class BatchWriter:
+    """
+    Collect generated files and write them together when the with block ends.
+
+    Parent directories are created once for the whole batch. If the block raises, nothing is written, so a
+    failing run does not leave a mix of old and new files behind.
+    """
+
+    def __init__(self):
+        """Start an empty batch."""
+        self._files: List[Tuple[Path, str]] = []
+
+    def write(self, path: Path, content: str):
+        """
+        Queue content to be written to path when the batch ends.
+
+        Args:
+            path (Path): Output file.
+            content (str): File content, written as UTF-8.
+        """
+        self._files.append((Path(path), content))
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        files, self._files = self._files, []
+        if exc_type is None:
+            for path, content in files:
+                write_output_file(path, content)
+        return False
+
+
+def write_json_file(path: Path, obj: Any, sort_keys: bool = False):
+    """Write obj as indented UTF-8 JSON, using orjson if available. Parent directories are created if needed."""
+    _ensure_parent_dir(path)
+    if orjson is not None:
+        # YAML sources may have non-string keys (e.g. response codes), json.dump writes them as strings as well
+        option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS  # pylint: disable=no-member
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS  # pylint: disable=no-member
+        path.write_bytes(orjson.dumps(obj, option=option))  # pylint: disable=no-member
+        return
     with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+        json.dump(obj, f, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+
+
+def load_json_file(path: Path) -> Any:
+    """Read a JSON file, using orjson if available."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())  # pylint: disable=no-member
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_schema_file(path: Path) -> Any:
+    """
+    Load a generated YAML file, preferring its JSON sibling (same name, .json suffix) if that is not older.
+
+    The schema generator writes both; the JSON copy is much faster to parse and is used by the other tools.
+
+    Args:
+        path (Path): The YAML file.
+    Returns:
+        Any: The parsed data.
+    """
+    json_path = path.with_suffix(".json")
+    try:
+        if json_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return load_json_file(json_path)
+    except (OSError, ValueError):
+        pass  # no usable JSON copy, fall back to the YAML file
+    with open(path, "r", encoding="utf-8") as f:
+        return load_yaml(f)
@@ -4,56 +4,150 @@ Generate OpenAPI schemas out of decorated Pydantic models for the Lost & Found p
 This script scans model sources, validates models, generates OpenAPI-compatible schemas, and writes them to disk.
 All main functions and helpers are documented for maintainability.
 """
+import argparse
+import json
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from importlib import import_module
+import importlib.metadata
 import importlib.util
-from collections import OrderedDict
-from typing import Any, Dict, List, Optional
-import yaml
-from helper import Config, patch_schema_all, write_output_file
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from helper import Config, patch_schema_all, write_json_file, dump_openapi_yaml
 from validation_utils import (print_section, print_error_list, print_validation_summary, import_model_class, check_schema_generation, check_response_discriminator,
                               check_request_discriminator, print_model_validation_summary, generate_schema_for_model, collect_defs, pretty_print_model_table)
 
-from shared import minimal_registry as registry
-
 # --------- UTILS AND HELPERS ---------
 
 
-def scan_directory_for_models(directory: str, recursive: bool = True) -> List[Path]:
-    """Scan a directory for Python model files for debugging or test importing."""
+def _module_name_for(py_file: Path, import_roots: List[Path]) -> Optional[str]:
+    """Dotted module name of py_file relative to the deepest import root containing it."""
+    for root in import_roots:
+        if py_file.is_relative_to(root):
+            parts = list(py_file.relative_to(root).with_suffix("").parts)
+            if parts and parts[-1] == "__init__":
+                parts.pop()
+            return ".".join(parts) if parts else None
+    return None
+
+
+SKIPPED_DIRS = frozenset({"__pycache__", "node_modules"})
+
+
+def _iter_python_files(base_path: Path, recursive: bool = True) -> Iterator[Path]:
+    """
+    Yield the .py files below base_path that may contain models.
+
+    Hidden dirs, __pycache__ and node_modules are pruned before descending; hidden files and tests are skipped.
+    """
+    for dirpath, dirs, files in os.walk(base_path):
+        dirs[:] = [d for d in dirs if recursive and not d.startswith('.') and d not in SKIPPED_DIRS]
+        for file_name in files:
+            if not file_name.endswith('.py') or file_name.startswith(('.', 'test_')) or file_name.endswith('_test.py'):
+                continue
+            yield Path(dirpath) / file_name
+
+
+def _load_scan_failures(cache_file: Path, py_files: List[Path]) -> Optional[Dict[str, list]]:
+    """
+    Load the files that failed to import on an earlier scan, as path -> [mtime_ns, size, error].
+
+    A failing import can depend on other files, so the cache is only used while no scanned file is newer than it.
+    Import errors are never stored, see scan_directory_for_models. None if there is no usable cache.
+    """
+    try:
+        cache_mtime = cache_file.stat().st_mtime_ns
+        if any(py_file.stat().st_mtime_ns > cache_mtime for py_file in py_files):
+            return None
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _import_model_file(py_file: Path, base_path: Path, import_roots: List[Path]) -> bool:
+    """Import one scanned file, by module name if possible; returns False if it cannot be loaded at all. Import errors are raised."""
+    module_name = _module_name_for(py_file.resolve(), import_roots)
+    if module_name:
+        try:
+            # honors sys.modules, modules imported before (or as dependency of another file) are not executed again
+            import_module(module_name)
+            return True
+        except ModuleNotFoundError as e:
+            # only the module itself (or one of its packages) not being found means it is not importable by name;
+            # anything else was raised by the module body, which must not be run a second time below
+            if not e.name or not (module_name == e.name or module_name.startswith(e.name + ".")):
+                raise
+    # not importable by name, load it under a unique name derived from its path below base_path
+    fallback_name = "_scan_" + py_file.relative_to(base_path).with_suffix("").as_posix().replace("/", ".")
+    if fallback_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(fallback_name, py_file)
+        if not (spec and spec.loader):
+            return False
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[fallback_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[fallback_name]
+            raise
+    return True
+
+
+def scan_directory_for_models(directory: str, recursive: bool = True, failure_cache: Optional[Path] = None) -> List[Path]:
+    """
+    Scan a directory for Python model files for debugging or test importing.
+
+    Args:
+        directory (str): Directory to scan.
+        recursive (bool): Also scan subdirectories.
+        failure_cache (Path, optional): JSON file remembering files that failed to import; they are skipped while unchanged.
+    Returns:
+        List[Path]: The imported files, relative to directory.
+    """
     base_path = Path(directory)
-    pattern = "**/*.py" if recursive else "*.py"
+    py_files = list(_iter_python_files(base_path, recursive))
+    known_failures = _load_scan_failures(failure_cache, py_files) if failure_cache is not None else None
+    failures: Dict[str, list] = {}
     original_path = sys.path.copy()
     if str(base_path) not in sys.path:
         sys.path.insert(0, str(base_path))
     if str(base_path.parent) not in sys.path:
         sys.path.insert(0, str(base_path.parent))
+    # deepest sys.path entries first, so files get the module name they are imported with elsewhere
+    import_roots = sorted({Path(p).resolve() for p in sys.path}, key=lambda root: len(root.parts), reverse=True)
     imported_modules = []
     try:
-        for py_file in base_path.glob(pattern):
-            if any(part.startswith('.') or part == '__pycache__' for part in py_file.parts):
-                continue
-            if py_file.name.startswith('test_') or py_file.name.endswith('_test.py'):
+        for py_file in py_files:
+            file_stat = py_file.stat()
+            known_failure = known_failures.get(str(py_file)) if known_failures else None
+            if known_failure and known_failure[:2] == [file_stat.st_mtime_ns, file_stat.st_size]:
+                print(f"Warning: Skipping {py_file.name}, it failed to import before: {known_failure[2]}")
+                failures[str(py_file)] = known_failure
                 continue
             try:
-                spec = importlib.util.spec_from_file_location("temp_module", py_file)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
+                if _import_model_file(py_file, base_path, import_roots):
                     imported_modules.append(py_file.relative_to(base_path))
             except (ImportError, FileNotFoundError, AttributeError, SyntaxError) as e:
                 print(f"Warning: Could not import {py_file.name}: {type(e).__name__}: {e}")
+                # import errors are not remembered, they usually go away by installing a package, which changes no scanned file
+                if not isinstance(e, ImportError):
+                    failures[str(py_file)] = [file_stat.st_mtime_ns, file_stat.st_size, f"{type(e).__name__}: {e}"]
             except Exception as e:  # pylint: disable=broad-exception-caught
                 # unexpected error, should be logged and investigated
                 print(f"Unexpected error while importing {py_file.name}: {type(e).__name__}: {e}")
     finally:
         sys.path = original_path
+    # also written when the cache was not usable, so an outdated one is replaced
+    if failure_cache is not None and failures != known_failures:
+        write_json_file(failure_cache, failures, sort_keys=True)
     return imported_modules
 
 
+@lru_cache(maxsize=None)
 def safe_import(modulename: str, classname: str) -> Optional[Any]:
-    """Safely import a class from a module."""
+    """Safely import a class from a module. Results (also failures) are cached, so errors are printed once."""
     try:
         module = import_module(modulename)
         model_class = getattr(module, classname)
@@ -67,43 +161,68 @@ def safe_import(modulename: str, classname: str) -> Optional[Any]:
         return None
 
 
-def get_models_from_registry() -> Dict[str, Any]:
-    """Get decorated models from model registry """
+@lru_cache(maxsize=None)
+def _get_registry() -> Any:
+    """Import the model registry on first use, so e.g. --help does not pay for it."""
+    from shared import minimal_registry  # pylint: disable=import-outside-toplevel
+    return minimal_registry
+
+
+class RegistryInfo(NamedTuple):
+    """Models known to the model registry, looked up once per run."""
+    models: Dict[str, Any]
+    response_models: Dict[str, Any]
+    request_models: Dict[str, Any]
+
+
+def _registry_lookup(getter_name: str, label: str) -> Dict[str, Any]:
+    """Call an optional registry getter, an empty dict is returned if it is missing or fails."""
     try:
-        return registry.get_registered_models()
+        return getattr(_get_registry(), getter_name, lambda: {})()
+    except (AttributeError, TypeError) as e:
+        print(f"Error accessing {label}: {type(e).__name__}: {e}")
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        print(f"Unexpected error accessing {label}: {type(e).__name__}: {e}")
+    return {}
+
+
+def get_models_from_registry() -> RegistryInfo:
+    """Get decorated models and the response/request models from model registry """
+    try:
+        models = _get_registry().get_registered_models()
     except ImportError:
         print("Warning: No registry found, scanning will not discover decorated models")
-        return {}
+        models = {}
     except Exception as e:  # pylint: disable=broad-exception-caught
         # unexpected error
         print(f"Unexpected error accessing registry: {type(e).__name__}: {e}")
-        return {}
+        models = {}
+    return RegistryInfo(models, _registry_lookup('get_response_models', "response_registry"), _registry_lookup('get_request_models', "request_registry"))
+
 
+def resolve_sources(model_sources: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Resolve the import paths of the model sources to classes once, for validation and generation.
 
-def validate_models(validation_models: Dict[str, Any]) -> bool:
-    """Validate Pydantic models and discriminators for response/request models."""
+    Args:
+        model_sources (dict): Model name -> 'module:Class' path or registry entry.
+    Returns:
+        list: (model name, model class) pairs in source order; the class is None if it could not be imported.
+    """
+    return [(model_name, import_model_class(import_path)) for model_name, import_path in model_sources.items()]
+
+
+def validate_models(validation_models: List[Tuple[str, Any]], registry_info: Optional[RegistryInfo] = None) -> bool:
+    """Validate Pydantic models and discriminators for response/request models, given as resolve_sources pairs."""
     validation_issues = []
     valid_models = []
     response_models = []
     request_models = []
-    try:
-        response_registry = getattr(registry, 'get_response_models', lambda: {})()
-    except (AttributeError, TypeError) as e:
-        print(f"Error accessing response_registry: {type(e).__name__}: {e}")
-        response_registry = {}
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        print(f"Unexpected error accessing response_registry: {type(e).__name__}: {e}")
-        response_registry = {}
-    try:
-        request_registry = getattr(registry, 'get_request_models', lambda: {})()
-    except (AttributeError, TypeError) as e:
-        print(f"Error accessing request_registry: {type(e).__name__}: {e}")
-        request_registry = {}
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        print(f"Unexpected error accessing request_registry: {type(e).__name__}: {e}")
-        request_registry = {}
-    for model_name, import_path in validation_models.items():
-        model_class = import_model_class(import_path)
+    if registry_info is None:
+        registry_info = get_models_from_registry()
+    response_registry = registry_info.response_models
+    request_registry = registry_info.request_models
+    for model_name, model_class in validation_models:
         if model_class is None:
             validation_issues.append(f"Could not import {model_name}")
             continue
@@ -115,11 +234,11 @@ def validate_models(validation_models: Dict[str, Any]) -> bool:
     return len(validation_issues) == 0
 
 
-def process_model_sources(model_sources: Dict[str, Any], global_defs: OrderedDict):
-    """Process models for schema extraction, collect all $defs and merge conflicts."""
+def process_model_sources(model_sources: List[Tuple[str, Any]], global_defs: Dict[str, Any]):
+    """Process models (resolve_sources pairs) for schema extraction, collect all $defs and merge conflicts."""
     processed_models = []
-    for model_name, import_path in model_sources.items():
-        model_class = import_model_class(import_path)
+    def_hashes: Dict[str, Any] = {}  # content hashes of global_defs entries, see collect_defs
+    for model_name, model_class in model_sources:
         if model_class is None:
             continue
         try:
@@ -131,8 +250,9 @@ def process_model_sources(model_sources: Dict[str, Any], global_defs: OrderedDic
             # unexpected error
             print(f"Unexpected error generating schema for {model_name}: {type(e).__name__}: {e}")
             continue
-        collect_defs(schema, global_defs)
+        collect_defs(schema, global_defs, def_hashes)
         global_defs[model_name] = schema
+        def_hashes.pop(model_name, None)
         processed_models.append(model_name)
     pretty_print_model_table(processed_models)
 
@@ -140,26 +260,27 @@ def process_model_sources(model_sources: Dict[str, Any], global_defs: OrderedDic
 # --------- MAIN SCRIPT ---------
 
 
-def load_and_combine_modelsources(config_obj_local) -> dict:
+def load_and_combine_modelsources(config_obj_local, registry_info: Optional[RegistryInfo] = None) -> dict:
     """Lädt und kombiniert Modelsourcen aus Registry und Config."""
-    registry_models = get_models_from_registry()
-    model_sources_dict_local = {src["name"]: src["import"] for src in config_obj_local.get_all_modelsources() if "name" in src and "import" in src}
+    if registry_info is None:
+        registry_info = get_models_from_registry()
+    registry_models = registry_info.models
+    # registry models win; config sources only fill the gaps, after the registry entries
+    model_sources_dict_local = {
+        src["name"]: src["import"] for src in config_obj_local.get_all_modelsources()
+        if "name" in src and "import" in src and src["name"] not in registry_models
+    }
     if registry_models:
         print(f"📦 Found {len(registry_models)} models from registry")
-        combined_sources = dict(registry_models)
-        for name, path in model_sources_dict_local.items():
-            if name not in combined_sources:
-                combined_sources[name] = path
-    else:
-        print(f"📦 Found {len(model_sources_dict_local)} models from config")
-        combined_sources = model_sources_dict_local
-    return combined_sources
+        return registry_models | model_sources_dict_local
+    print(f"📦 Found {len(model_sources_dict_local)} models from config")
+    return model_sources_dict_local
 
 
-def validate_and_report(model_sources_dict_inner: dict) -> bool:
+def validate_and_report(model_sources_dict_inner: List[Tuple[str, Any]], registry_info: Optional[RegistryInfo] = None) -> bool:
     """Validiert Modelle und gibt Ergebnis aus."""
     print_section("Validating models")
-    validation_result = validate_models(model_sources_dict_inner)
+    validation_result = validate_models(model_sources_dict_inner, registry_info)
     if not validation_result:
         print_error_list(["Validation completed with issues – see warnings above"])
     else:
@@ -167,16 +288,90 @@ def validate_and_report(model_sources_dict_inner: dict) -> bool:
     return validation_result
 
 
-def generate_and_write_schema(model_sources_dict_inner: dict, config_obj_local) -> int:
+def _schema_manifest_file(schema_file: Path) -> Path:
+    """Manifest of the run that generated schema_file, stored next to it."""
+    return schema_file.with_name(schema_file.name + ".manifest.json")
+
+
+def _schema_inputs_state(schema_file: Path, input_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Current state of everything the schema file is generated from, as recorded in its manifest.
+
+    Covers the installed pydantic version, the stats of the model files below input_dir, of the generator scripts and
+    config next to this file, and of the generated files themselves. None if the schema file is not generated yet.
+    """
+    devtools_dir = Path(__file__).parent
+    inputs = sorted(str(path) for path in (devtools_dir / "config.json5", *devtools_dir.glob("*.py"), *_iter_python_files(input_dir)))
+    try:
+        files = {}
+        for path in [*inputs, str(schema_file), str(schema_file.with_suffix(".json"))]:
+            stat = os.stat(path)
+            files[path] = [stat.st_mtime_ns, stat.st_size]
+        # read from the package metadata, importing pydantic would cost more than the whole check
+        pydantic_version = importlib.metadata.version("pydantic")
+    except (OSError, importlib.metadata.PackageNotFoundError):
+        return None
+    return {"pydantic": pydantic_version, "files": files}
+
+
+def schema_file_is_up_to_date(schema_file: Path, input_dir: Path) -> bool:
+    """
+    Check whether the schema file was generated from exactly the current inputs.
+
+    Compares against the manifest written by write_schema_manifest, so added, changed, deleted or moved model files,
+    changed generator files and a different pydantic version all count as changes.
+
+    Args:
+        schema_file (Path): The generated schemas.yaml.
+        input_dir (Path): Directory scanned for models.
+    Returns:
+        bool: True if no input changed since the last run.
+    """
+    try:
+        with open(_schema_manifest_file(schema_file), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False  # not generated yet or by an older version
+    return manifest == _schema_inputs_state(schema_file, input_dir)
+
+
+def write_schema_manifest(schema_file: Path, input_dir: Path):
+    """Record the inputs the schema file was just generated from, for schema_file_is_up_to_date."""
+    state = _schema_inputs_state(schema_file, input_dir)
+    if state is not None:
+        write_json_file(_schema_manifest_file(schema_file), state, sort_keys=True)
+
+
+SCHEMA_FILE_HEADER = "# This file is auto-generated from Pydantic models. Do not edit by hand!\n\n"
+
+
+def write_schema_file(schema_file: Path, combined_schema: dict):
+    """
+    Write the combined schema as YAML with sorted keys, streaming it into the file with dump_openapi_yaml.
+
+    Args:
+        schema_file (Path): Output file.
+        combined_schema (dict): Patched schema in the form {"components": {"schemas": {...}}}, in any key order.
+    """
+    schema_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(schema_file, "w", encoding="utf-8") as f:
+        f.write(SCHEMA_FILE_HEADER)
+        dump_openapi_yaml(combined_schema, f, sort_keys=True)
+
+
+def generate_and_write_schema(model_sources_dict_inner: List[Tuple[str, Any]], config_obj_local) -> int:
     """Generiert und schreibt das Schema, gibt die Anzahl der generierten Schemas zurück."""
     print_section("Generating schemas")
-    global_defs = OrderedDict()
+    global_defs: Dict[str, Any] = {}
     process_model_sources(model_sources_dict_inner, global_defs)
-    print_section("Patching schema for OpenAPI 3.x and dictify")
-    combined_schema = patch_schema_all({"components": {"schemas": global_defs}})
+    print_section("Patching schema for OpenAPI 3.x")
+    # patched in place, the writer sorts the keys, so no sorted copy of the whole schema is built
+    combined_schema = patch_schema_all({"components": {"schemas": global_defs}}, sorted_copy=False)
     schema_file_local = config_obj_local.get_path("schema_file")
     print_section("Writing output")
-    write_output_file(schema_file_local, "# This file is auto-generated from Pydantic models. Do not edit by hand!\n\n" + yaml.dump(combined_schema, sort_keys=False))
+    write_schema_file(schema_file_local, combined_schema)
+    # written after the YAML so it is not older; the other tools read this copy (see helper.load_schema_file)
+    write_json_file(schema_file_local.with_suffix(".json"), combined_schema, sort_keys=True)
     print(f"✅ Generated schema: {schema_file_local}")
     print(f"📊 Total schemas: {len(global_defs)}")
     return len(global_defs)
@@ -195,18 +390,30 @@ def print_summary(imported_files_list_local, model_sources_dict_local, num_schem
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate OpenAPI schemas from the Pydantic models.")
+    arg_parser.add_argument("--force", action="store_true", help="regenerate the schema file even if no model, config or generator file changed")
+    arg_parser.add_argument("--no-schema-cache", action="store_true", help="import all model files, ignoring the scan failure cache next to the schema file")
+    args = arg_parser.parse_args()
+
     print("🚀 Schema Generator for Lost & Found Platform")
     print("=" * 60)
     config_obj_main = Config.load("config.json5")
     schema_file_main = config_obj_main.get_path("schema_file")
     input_dir_main = config_obj_main.get_path("input_dir")
+    if not args.force and schema_file_is_up_to_date(schema_file_main, input_dir_main):
+        print(f"✅ {schema_file_main} is up-to-date, nothing to do (use --force to regenerate)")
+        sys.exit(0)
+    cache_dir_main = None if args.no_schema_cache else schema_file_main.parent / ".cache"
     print(f"📁 Scanning directory: {input_dir_main}")
-    imported_files_list_main = scan_directory_for_models(str(input_dir_main), recursive=True)
+    imported_files_list_main = scan_directory_for_models(str(input_dir_main), recursive=True, failure_cache=cache_dir_main and cache_dir_main / "scan_failures.json")
     print(f"✅ Imported {len(imported_files_list_main)} Python files")
-    model_sources_dict_main = load_and_combine_modelsources(config_obj_main)
+    registry_info_main = get_models_from_registry()
+    model_sources_dict_main = load_and_combine_modelsources(config_obj_main, registry_info_main)
     if not model_sources_dict_main:
         print("❌ No models found – aborting")
         sys.exit(1)
-    VALIDATION_PASSED = validate_and_report(model_sources_dict_main)
-    num_schemas_int_main = generate_and_write_schema(model_sources_dict_main, config_obj_main)
+    resolved_sources_main = resolve_sources(model_sources_dict_main)
+    VALIDATION_PASSED = validate_and_report(resolved_sources_main, registry_info_main)
+    num_schemas_int_main = generate_and_write_schema(resolved_sources_main, config_obj_main)
+    write_schema_manifest(schema_file_main, input_dir_main)
     print_summary(imported_files_list_main, model_sources_dict_main, num_schemas_int_main, VALIDATION_PASSED)
@@ -5,25 +5,37 @@ Combines OpenAPI and schema files, validates references, and groups endpoints by
 All main functions and helpers are documented for maintainability.
 """
 
+import json
 import os
 import sys
-from copy import deepcopy
-from typing import Any, Dict, List, DefaultDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, DefaultDict, Optional, Tuple
 from collections import defaultdict
-import yaml
-from prance import BaseParser, ValidationError
-from helper import Config, extract_schema_refs, validation_error_printer, patch_schema_all
+from helper import (Config, append_node_schema_refs, extract_schema_refs, validation_error_printer, patch_schema_all, write_json_file, load_json_file,
+                    load_schema_file, load_yaml, dump_yaml)
 from validation_utils import print_section, print_error_list, print_validation_summary
 
+# prance is imported where needed, it is slow to import and only used for the final parse step
+
+_HTTP_METHODS = frozenset({"GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"})
+_SCHEMA_REF_PREFIX = "#/components/schemas/"
+_SCHEMA_REF_PREFIX_LEN = len(_SCHEMA_REF_PREFIX)
+
+
+_COMPONENT_ORDER = ('schemas', 'responses', 'parameters', 'examples', 'requestBodies', 'headers', 'securitySchemes', 'links', 'callbacks')
 
-def sort_components(components):
-    """Sort schema components in a fixed order to ensure consistent output"""
-    component_order = ['schemas', 'responses', 'parameters', 'examples', 'requestBodies', 'headers', 'securitySchemes', 'links', 'callbacks']
 
+def sort_components(components):
+    """Sort schema components in a fixed order to ensure consistent output; already sorted sections are kept as they are"""
     sorted_components = {}
-    for key in component_order:
-        if key in components:
-            sorted_components[key] = dict(sorted(components[key].items()))
+    for key in _COMPONENT_ORDER:
+        section = components.get(key)
+        if section is None:
+            continue
+        names = list(section)
+        sorted_names = sorted(names)
+        sorted_components[key] = section if names == sorted_names else {name: section[name] for name in sorted_names}
 
     return sorted_components
 
@@ -55,40 +67,139 @@ def sort_openapi_structure(openapi_data):
     return sorted_openapi
 
 
-def combine_openapi(openapi_path: str, schemas_path: str, out_path: str = "openapi_combined.yaml") -> Dict[str, Any]:
+def combine_openapi(openapi_path: str, schemas_path: str, out_path: str = "openapi_combined.yaml") -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
     Combines OpenAPI YAML with external schemas into a self-contained file.
-    Returns the combined spec for validation.
+    The file is written as JSON if out_path ends with .json, otherwise as YAML.
+    Returns the combined spec and its reference index (see collect_spec_refs) for validation.
     """
     with open(openapi_path, 'r', encoding='utf-8') as f:
-        openapi = yaml.safe_load(f)
+        openapi = load_yaml(f)
 
-    with open(schemas_path, 'r', encoding='utf-8') as f:
-        schemas = yaml.safe_load(f)
+    schemas = load_schema_file(Path(schemas_path))
 
-    combined = deepcopy(openapi)
+    # openapi is freshly loaded and owned by this function, it can be extended in place
+    combined = openapi
     combined.setdefault('components', {})['schemas'] = schemas['components']['schemas']
 
     combined = sort_openapi_structure(patch_schema_all(combined))
 
-    with open(out_path, 'w', encoding='utf-8') as f:
-        yaml.dump(combined, f, sort_keys=False, default_flow_style=False, allow_unicode=True)
+    if out_path.lower().endswith(".json"):
+        # intermediate file for Prance, JSON avoids the slow YAML emit/parse round trip
+        write_json_file(Path(out_path), combined)
+    else:
+        with open(out_path, 'w', encoding='utf-8') as f:
+            # no line folding, long descriptions are written in one piece instead of searching for wrap points
+            dump_yaml(combined, f, sort_keys=False, default_flow_style=False, allow_unicode=True, width=1 << 30)
 
     print(f'Combined OpenAPI written to: {out_path}')
-    return combined
+    return combined, collect_spec_refs(combined)
+
+
+def build_schema_index(api_spec: Dict[str, Any]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    Collect the available component schemas once for all validators.
+    Returns the schema names and the matching '#/components/schemas/<name>' references.
+    """
+    schema_names: FrozenSet[str] = frozenset()
+    if 'components' in api_spec and 'schemas' in api_spec['components']:
+        schema_names = frozenset(api_spec['components']['schemas'])
+    schema_refs = frozenset(_SCHEMA_REF_PREFIX + name for name in schema_names)
+    return schema_names, schema_refs
+
+
+def _walk_refs(root: Any, root_link: Tuple, refs: List[Tuple[str, Tuple]], extracted: Optional[List[str]] = None):
+    """
+    Collect all $ref strings below root as (reference, link) into refs, walking the tree with an explicit stack.
+    If extracted is given, the request/response references of every node (see extract_schema_refs) are appended there too.
+    Nodes are dispatched on their exact type, the combined spec only holds plain dicts and lists.
+    """
+    # path of a node is kept as (parent_link, key) and only formatted for missing refs;
+    # list indices are wrapped as (index,), so they are not mistaken for integer dict keys such as unquoted status codes
+    stack = [(root, root_link)]
+    while stack:
+        obj, link = stack.pop()
+        obj_type = type(obj)
+        if obj_type is dict:
+            if extracted is not None:
+                append_node_schema_refs(obj, extracted)
+            # a $ref string is pushed like a child, so it is reported at its position among the nested refs
+            children = [(value, (link, key)) for key, value in obj.items()
+                        if type(value) in (dict, list) or (key == '$ref' and isinstance(value, str))]
+            # reversed, so nodes are reported in document order
+            stack.extend(reversed(children))
+
+        elif obj_type is list:
+            stack.extend(reversed([(item, (link, (i,))) for i, item in enumerate(obj) if type(item) in (dict, list)]))
+
+        else:
+            refs.append((obj, link))
+
+
+def _collect_operation_refs(operation: dict, link: Tuple, refs: List[Tuple[str, Tuple]]) -> Dict[str, Any]:
+    """Walk one operation, collecting its $refs and the references of its requestBody and of each response"""
+    operation_refs: Dict[str, Any] = {'requestBody': None, 'responses': None}
+    for key, value in operation.items():
+        child = (link, key)
+        if key == '$ref' and isinstance(value, str):
+            refs.append((value, child))
+        elif key == 'requestBody':
+            operation_refs['requestBody'] = []
+            _walk_refs(value, child, refs, operation_refs['requestBody'])
+        elif key == 'responses' and isinstance(value, dict):
+            responses = operation_refs['responses'] = {}
+            for status_code, response in value.items():
+                responses[status_code] = []
+                if status_code == '$ref' and isinstance(response, str):
+                    refs.append((response, (child, status_code)))
+                else:
+                    _walk_refs(response, (child, status_code), refs, responses[status_code])
+        elif isinstance(value, (dict, list)):
+            _walk_refs(value, child, refs)
+    return operation_refs
 
 
-def validate_schema_references(api_spec: Dict[str, Any]) -> Dict[str, Any]:
+def collect_spec_refs(api_spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Walk the spec once and collect everything the pre-Prance validators need.
+    Returns a dict with
+      'refs': all $ref strings below paths and components as (reference, link) in document order,
+      'invalid_paths': path names whose item is not a dict,
+      'operations': {(path_name, method): {'requestBody': refs or None, 'responses': {status_code: refs} or None}}.
+    """
+    spec_refs: Dict[str, Any] = {'refs': [], 'invalid_paths': [], 'operations': {}}
+    refs = spec_refs['refs']
+
+    for path_name, path_item in api_spec.get('paths', {}).items():
+        if not isinstance(path_item, dict):
+            spec_refs['invalid_paths'].append(path_name)
+            continue
+        path_link = (None, f"paths.{path_name}")
+        for method, operation in path_item.items():
+            if method == '$ref' and isinstance(operation, str):
+                refs.append((operation, (path_link, method)))
+            elif isinstance(operation, dict):
+                spec_refs['operations'][(path_name, method)] = _collect_operation_refs(operation, (path_link, method), refs)
+            elif isinstance(operation, list):
+                _walk_refs(operation, (path_link, method), refs)
+
+    if 'components' in api_spec:
+        _walk_refs(api_spec['components'], (None, "components"), refs)
+
+    return spec_refs
+
+
+def validate_schema_references(api_spec: Dict[str, Any], schema_names: Optional[FrozenSet[str]] = None, spec_refs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Pre-Prance validation: Check if all $ref references can be resolved.
+    schema_names and spec_refs can be passed in if already built by build_schema_index and collect_spec_refs.
     Returns detailed validation report.
     """
     validation_report = {'valid': True, 'missing_refs': [], 'invalid_paths': [], 'schema_issues': [], 'total_refs_checked': 0}
 
     # Get all available schemas
-    available_schemas = set()
+    available_schemas = schema_names if schema_names is not None else build_schema_index(api_spec)[0]
     if 'components' in api_spec and 'schemas' in api_spec['components']:
-        available_schemas = set(api_spec['components']['schemas'].keys())
         print(f"📋 Available schemas ({len(available_schemas)}):")
         # Print in 4 columns
         schema_list = list(available_schemas)
@@ -96,100 +207,104 @@ def validate_schema_references(api_spec: Dict[str, Any]) -> Dict[str, Any]:
             row = schema_list[i:i + 4]
             print('\t'.join(f"{name:<40}" for name in row))
 
-    def check_refs_recursive(obj, path=""):
-        """Recursively check all $ref references"""
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                current_path = f"{path}.{key}" if path else key
-
-                if key == '$ref' and isinstance(value, str):
-                    validation_report['total_refs_checked'] += 1
+    def format_path(link) -> str:
+        """Build the dotted path string from a (parent, key) link chain, only needed for reporting"""
+        keys = []
+        while link is not None:
+            link, key = link
+            keys.append(key)
+        path = ""
+        for key in reversed(keys):
+            if isinstance(key, tuple):
+                path = f"{path}[{key[0]}]"
+            else:
+                path = f"{path}.{key}" if path else key
+        return path
+
+    def check_ref(value, link):
+        """Check a single $ref value, link is the (parent, key) chain of the $ref entry"""
+        validation_report['total_refs_checked'] += 1
+
+        # Check if it's a schema reference
+        if value.startswith(_SCHEMA_REF_PREFIX):
+            schema_name = value[_SCHEMA_REF_PREFIX_LEN:]
+            if schema_name not in available_schemas:
+                validation_report['missing_refs'].append({'path': format_path(link), 'reference': value, 'schema_name': schema_name})
+                validation_report['valid'] = False
 
-                    # Check if it's a schema reference
-                    if value.startswith('#/components/schemas/'):
-                        schema_name = value.replace('#/components/schemas/', '')
-                        if schema_name not in available_schemas:
-                            validation_report['missing_refs'].append({'path': current_path, 'reference': value, 'schema_name': schema_name})
-                            validation_report['valid'] = False
+    if spec_refs is None:
+        spec_refs = collect_spec_refs(api_spec)
 
-                else:
-                    check_refs_recursive(value, current_path)
+    # Check all paths and components
+    if spec_refs['invalid_paths']:
+        validation_report['invalid_paths'].extend(spec_refs['invalid_paths'])
+        validation_report['valid'] = False
 
-        elif isinstance(obj, list):
-            for i, item in enumerate(obj):
-                current_path = f"{path}[{i}]" if path else f"[{i}]"
-                check_refs_recursive(item, current_path)
+    for value, link in spec_refs['refs']:
+        check_ref(value, link)
 
-    # Check all paths
-    if 'paths' in api_spec:
-        for path_name, path_item in api_spec['paths'].items():
-            if not isinstance(path_item, dict):
-                validation_report['invalid_paths'].append(path_name)
-                validation_report['valid'] = False
-                continue
+    return validation_report
 
-            check_refs_recursive(path_item, f"paths.{path_name}")
 
-    # Check components
-    if 'components' in api_spec:
-        check_refs_recursive(api_spec['components'], "components")
+def _operation_context(operation_key: Tuple[str, str]) -> str:
+    """Format an operation as 'METHOD /path' for reporting; only called for issues, not for every operation"""
+    path_name, method = operation_key
+    return f"{method.upper()} {path_name}"
 
-    return validation_report
 
-
-def _check_request_body(operation: dict, operation_context: str, available_schemas: set, validation_report: dict):
-    """Check requestBody schema references for validity."""
+def _check_request_body(operation: dict, operation_key: Tuple[str, str], available_schemas: FrozenSet[str], validation_report: dict, request_refs: Optional[List[str]] = None):
+    """Check requestBody schema references for validity. request_refs can be passed in if already collected."""
     if 'requestBody' not in operation:
         return
     validation_report['request_body_count'] += 1
-    request_refs = extract_schema_refs(operation['requestBody'], f"{operation_context}.requestBody")
+    if request_refs is None:
+        request_refs = extract_schema_refs(operation['requestBody'])
     for ref in request_refs:
         if ref not in available_schemas:
-            validation_report['issues'].append({'type': 'missing_request_schema', 'operation': operation_context, 'reference': ref})
+            validation_report['issues'].append({'type': 'missing_request_schema', 'operation': _operation_context(operation_key), 'reference': ref})
             validation_report['valid'] = False
 
 
-def _check_responses(operation: dict, operation_context: str, available_schemas: set, validation_report: dict):
-    """Check response schema references for validity."""
+def _check_responses(operation: dict, operation_key: Tuple[str, str], available_schemas: FrozenSet[str], validation_report: dict,
+                     refs_by_status: Optional[Dict[Any, List[str]]] = None):
+    """
+    Check response schema references for validity and the discriminators of the response schemas (Lost & Found specific).
+    Both checks are done in one pass over the responses. refs_by_status can be passed in if already collected.
+    """
     if 'responses' not in operation:
         return
     for status_code, response in operation['responses'].items():
         validation_report['response_count'] += 1
-        response_refs = extract_schema_refs(response, f"{operation_context}.responses.{status_code}")
+        if refs_by_status is not None:
+            response_refs = refs_by_status[status_code]
+        else:
+            response_refs = extract_schema_refs(response)
         for ref in response_refs:
             if ref not in available_schemas:
-                validation_report['issues'].append({'type': 'missing_response_schema', 'operation': operation_context, 'response': status_code, 'reference': ref})
+                validation_report['issues'].append({'type': 'missing_response_schema', 'operation': _operation_context(operation_key), 'response': status_code, 'reference': ref})
                 validation_report['valid'] = False
-
-
-def _check_discriminator(operation: dict, operation_context: str, validation_report: dict):
-    """Check for discriminator field in response schemas (Lost & Found specific)."""
-    if 'responses' not in operation:
-        return
-    for status_code, response in operation['responses'].items():
-        content = response.get('content', {})
-        for _, media_obj in content.items():
+        for media_obj in response.get('content', {}).values():
             schema = media_obj.get('schema', {})
             if isinstance(schema, dict) and 'discriminator' in schema:
                 disc = schema['discriminator']
                 if 'propertyName' not in disc or not disc['propertyName']:
                     validation_report['discriminator_issues'].append({
-                        'context': f"{operation_context}.responses.{status_code}",
+                        'context': f"{_operation_context(operation_key)}.responses.{status_code}",
                         'issue': 'Missing or empty discriminator propertyName'
                     })
                     validation_report['valid'] = False
                 # Optionally: check mapping completeness, etc.
 
 
-def validate_request_response_schemas(api_spec: Dict[str, Any]) -> Dict[str, Any]:
+def validate_request_response_schemas(api_spec: Dict[str, Any], schema_refs: Optional[FrozenSet[str]] = None, spec_refs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Validate that requestBody and response schemas reference valid schemas.
     Focus on Lost & Found platform specific validation, including discriminator checks.
+    schema_refs and spec_refs can be passed in if already built by build_schema_index and collect_spec_refs,
+    without spec_refs the request bodies and responses are walked here.
     """
     validation_report = {'valid': True, 'issues': [], 'request_body_count': 0, 'response_count': 0, 'discriminator_issues': []}
-    available_schemas = set()
-    if 'components' in api_spec and 'schemas' in api_spec['components']:
-        available_schemas = set(f"#/components/schemas/{name}" for name in api_spec['components']['schemas'].keys())
+    available_schemas = schema_refs if schema_refs is not None else build_schema_index(api_spec)[1]
     if 'paths' in api_spec:
         for path_name, path_item in api_spec['paths'].items():
             if not isinstance(path_item, dict):
@@ -197,24 +312,28 @@ def validate_request_response_schemas(api_spec: Dict[str, Any]) -> Dict[str, Any
             for method, operation in path_item.items():
                 if not isinstance(operation, dict):
                     continue
-                operation_context = f"{method.upper()} {path_name}"
-                _check_request_body(operation, operation_context, available_schemas, validation_report)
-                _check_responses(operation, operation_context, available_schemas, validation_report)
-                _check_discriminator(operation, operation_context, validation_report)
+                operation_key = (path_name, method)
+                operation_refs = spec_refs['operations'][operation_key] if spec_refs is not None else {'requestBody': None, 'responses': None}
+                _check_request_body(operation, operation_key, available_schemas, validation_report, operation_refs['requestBody'])
+                _check_responses(operation, operation_key, available_schemas, validation_report, operation_refs['responses'])
     return validation_report
 
 
-def detailed_validation_report(validate_sepec: Dict[str, Any]) -> bool:
+def detailed_validation_report(validate_sepec: Dict[str, Any], spec_refs: Optional[Dict[str, Any]] = None) -> bool:
     """
     Comprehensive validation before sending to Prance.
+    spec_refs can be passed in if already collected (combine_openapi returns it), so the spec is not walked again.
     Returns True if validation passes, False otherwise.
     """
     print_section("Pre-Prance Validation")
     print("=" * 50)
+    schema_names, schema_refs = build_schema_index(validate_sepec)
+    if spec_refs is None:
+        spec_refs = collect_spec_refs(validate_sepec)
 
     # 1. Schema Reference Validation
     print("📋 Checking schema references...")
-    ref_validation = validate_schema_references(validate_sepec)
+    ref_validation = validate_schema_references(validate_sepec, schema_names, spec_refs)
 
     if ref_validation['missing_refs']:
         print(f"❌ Found {len(ref_validation['missing_refs'])} missing schema references:")
@@ -224,7 +343,7 @@ def detailed_validation_report(validate_sepec: Dict[str, Any]) -> bool:
 
     # 2. Request/Response Schema Validation
     print("\n🔧 Checking request/response schemas...")
-    req_res_validation = validate_request_response_schemas(validate_sepec)
+    req_res_validation = validate_request_response_schemas(validate_sepec, schema_refs, spec_refs)
 
     if req_res_validation['issues']:
         print(f"❌ Found {len(req_res_validation['issues'])} request/response issues:")
@@ -249,10 +368,20 @@ def detailed_validation_report(validate_sepec: Dict[str, Any]) -> bool:
     return overall_valid
 
 
+@lru_cache(maxsize=8)
+def _parse_cached(filename: str, mtime_ns: int) -> Any:
+    """Parse and validate an OpenAPI file with Prance; cached per file modification time."""
+    from prance import BaseParser  # pylint: disable=import-outside-toplevel
+    _ = mtime_ns  # only part of the cache key
+    return BaseParser(filename).specification
+
+
 def load_openapi_by_tag(filename: str) -> DefaultDict[str, List[Dict[str, Any]]]:
     """
     Loads an OpenAPI YAML/JSON file, parses it, and returns all endpoints grouped by tag.
     """
+    from prance import ValidationError  # pylint: disable=import-outside-toplevel
+
     if not os.path.isfile(filename):
         raise FileNotFoundError(f"File not found: {filename}")
 
@@ -260,8 +389,7 @@ def load_openapi_by_tag(filename: str) -> DefaultDict[str, List[Dict[str, Any]]]
         raise ValueError("Expected an OpenAPI file with extension .yaml, .yml, or .json")
 
     try:
-        parser = BaseParser(filename)
-        spec: Any = parser.specification
+        spec: Any = _parse_cached(filename, os.stat(filename).st_mtime_ns)
     except ValidationError as ve:
         print("\n❌ Prance Validation Failed:")
         validation_error_printer(ve)
@@ -283,14 +411,15 @@ def load_openapi_by_tag(filename: str) -> DefaultDict[str, List[Dict[str, Any]]]
             if not isinstance(details, dict):
                 continue
 
-            if method.upper() not in {"GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"}:
+            http_method = method.upper()
+            if http_method not in _HTTP_METHODS:
                 continue
 
             path_tags = details.get("tags", ["untagged"])
             for path_tag in path_tags:
                 tagged_endpoints[path_tag].append({
                     "path": path,
-                    "method": method.upper(),
+                    "method": http_method,
                     "operationId": details.get("operationId"),
                     "summary": details.get("summary"),
                     "parameters": details.get("parameters", []),
@@ -301,7 +430,36 @@ def load_openapi_by_tag(filename: str) -> DefaultDict[str, List[Dict[str, Any]]]
     return tagged_endpoints
 
 
+def load_openapi_by_tag_cached(filename: str) -> DefaultDict[str, List[Dict[str, Any]]]:
+    """
+    Like load_openapi_by_tag, but keeps the result in filename + ".tags.cache.json" for later runs.
+
+    The cache is used while the file's modification time and size are unchanged, so Prance only parses a new file.
+    """
+    stat = os.stat(filename)
+    key = [stat.st_mtime_ns, stat.st_size]
+    cache_file = Path(filename + ".tags.cache.json")
+    try:
+        cached = load_json_file(cache_file)
+        if cached.get("key") == key:
+            return defaultdict(list, cached["tags"])
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass  # no usable cache, parse the file
+
+    tagged_endpoints = load_openapi_by_tag(filename)
+    entry = {"key": key, "tags": tagged_endpoints}
+    try:
+        # only cached if JSON keeps it as it is, e.g. integer status codes from a YAML file would come back as strings
+        if json.loads(json.dumps(entry)) == entry:
+            write_json_file(cache_file, entry)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Warning: Could not cache tags in {cache_file}: {type(e).__name__}: {e}")
+    return tagged_endpoints
+
+
 if __name__ == "__main__":
+    import prance
+
     cfg = Config.load("config.json5")
     openapi_file = cfg.get_path("openapi_file")
     schemas_file = cfg.get_path("schema_file")
@@ -313,10 +471,10 @@ if __name__ == "__main__":
 
     # Step 1: Combine files
     print(f"📁 Combining {openapi_file} + {schemas_file}")
-    combined_spec = combine_openapi(openapi_path=str(openapi_file), schemas_path=str(schemas_file), out_path=str(temp_file))
+    combined_spec, combined_refs = combine_openapi(openapi_path=str(openapi_file), schemas_path=str(schemas_file), out_path=str(temp_file))
 
     # Step 2: Pre-validation
-    validation_passed = detailed_validation_report(combined_spec)
+    validation_passed = detailed_validation_report(combined_spec, combined_refs)
 
     if not validation_passed:
         print("\n⚠️  Pre-validation failed, but continuing with Prance...")
@@ -327,7 +485,8 @@ if __name__ == "__main__":
     # Step 3: Prance validation and parsing
     print("\n🔧 Running Prance validation and parsing...")
     try:
-        tags = load_openapi_by_tag(str(temp_file))
+        # also leaves the tags cache for s3, which then does not have to parse the file again
+        tags = load_openapi_by_tag_cached(str(temp_file))
 
         print("\n✅ Prance validation passed!")
         print(f"📊 Found {sum(len(endpoints) for endpoints in tags.values())} endpoints in {len(tags)} tags")
@@ -337,6 +496,6 @@ if __name__ == "__main__":
             for ep in endpoints:
                 print(f"   {ep['method']} {ep['path']} - {ep['operationId']} ({ep['summary']})")
 
-    except (ValidationError, RuntimeError) as e:
+    except (prance.ValidationError, RuntimeError) as e:
         print(f"\n❌ Prance validation/parsing failed: {e}")
         sys.exit(1)
@@ -6,10 +6,11 @@ All main functions and helpers are documented for maintainability.
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
-from s2_generate_api import load_openapi_by_tag
-from helper import Config, load_jinja_template, render_jinja_template, extract_user_code_blocks, inject_user_code, write_output_file
+from typing import Dict, Any, Optional
+from s2_generate_api import load_openapi_by_tag_cached
+from helper import BatchWriter, Config, load_jinja_template, render_jinja_template, extract_user_code_blocks, inject_user_code, write_output_file
 from validation_utils import print_section, print_error_list
 
 # Config und OpenAPI laden
@@ -24,7 +25,7 @@ lambda_functions = config.get_lambda_functions()
 
 def check_missing_parameters(expected, provided):
     """
-    Print and return missing parameters between expected and provided dicts.
+    Return missing parameters between expected and provided dicts; both are printed only if something is missing.
 
     Args:
         expected (dict): Expected parameters (from template).
@@ -32,15 +33,15 @@ def check_missing_parameters(expected, provided):
     Returns:
         set: Set of missing parameter names.
     """
-    print(f"Expected parameters: {json.dumps(expected, indent=2)}")
-    print(f"Provided parameters: {json.dumps(provided, indent=2)}")
-    missing = set(expected) - set(provided)
+    missing = expected.keys() - provided.keys()
     if missing:
+        print(f"Expected parameters: {json.dumps(expected, indent=2)}")
+        print(f"Provided parameters: {json.dumps(provided, indent=2)}")
         print(f"Missing parameters: {json.dumps(list(missing), indent=2)}")
     return missing
 
 
-def process_template(template_name: str, template_dir: str, template_variables: Dict[str, Any], output_path: Path) -> bool:
+def process_template(template_name: str, template_dir: str, template_variables: Dict[str, Any], output_path: Path, writer: Optional[BatchWriter] = None) -> bool:
     """
     Render a Jinja2 template with variables, merge user code blocks, and write to output file.
 
@@ -49,22 +50,26 @@ def process_template(template_name: str, template_dir: str, template_variables:
         template_dir (str): Directory containing the template.
         template_variables (dict): Variables for template rendering.
         output_path (Path): Output file path.
+        writer (BatchWriter, optional): Batch to queue the output in; written immediately if not given.
     Returns:
         bool: True if successful, False if missing parameters.
     """
     template, expected_parameters = load_jinja_template(template_name, template_dir)
-    if check_missing_parameters(expected_parameters, template_variables):
-        print_error_list([f"Missing parameter: {k}" for k in set(expected_parameters) - set(template_variables)])
+    missing = check_missing_parameters(expected_parameters, template_variables)
+    if missing:
+        print_error_list([f"Missing parameter: {k}" for k in missing])
         return False
-    user_blocks = {}
-    if output_path.exists():
-        user_blocks = extract_user_code_blocks(output_path)
-        if user_blocks:
-            print(f"Merging user code blocks for {output_path.name}")
+    # empty if the file does not exist yet
+    user_blocks = extract_user_code_blocks(output_path)
+    if user_blocks:
+        print(f"Merging user code blocks for {output_path.name}")
     code = render_jinja_template(template=template, **template_variables)
     if user_blocks:
         code = inject_user_code(code, user_blocks)
-    write_output_file(output_path, code)
+    if writer is not None:
+        writer.write(output_path, code)
+    else:
+        write_output_file(output_path, code)
     return True
 
 
@@ -74,46 +79,64 @@ for func in lambda_functions:
     merged_func = {**generic_config, **(func or {})}
     merged_lambda_functions.append(merged_func)
 
-tags = load_openapi_by_tag(str(openapi_file))
+# tag_name -> merged config, the first function per tag wins
+config_by_tag: Dict[str, Dict[str, Any]] = {}
+for merged_func in merged_lambda_functions:
+    if merged_func.get("tag_name") is not None:
+        config_by_tag.setdefault(merged_func["tag_name"], merged_func)
+
+tags = load_openapi_by_tag_cached(str(openapi_file))
+
+TEMPLATE_DIR = "api/devtools/templates/runtime"
+# template name -> output file suffix, rendered for every tag
+TEMPLATES = (
+    ("handler_ABC.py.j2", "_ABC.py"),  # Abc-Handler
+    ("lambda_handler.py.j2", "_lambda_handler.py"),  # Lambda-Handler
+    ("handler_impl.py.j2", "_handler_impl.py"),  # Handler-Implementation prototype
+)
+
+# compile the templates once up front, the per-tag workers then only hit the cache
+for template_file, _ in TEMPLATES:
+    load_jinja_template(template_file, TEMPLATE_DIR)
 
-for tag, endpoints in tags.items():
 
+def render_tag(tag: str, endpoints: Any, writer: Optional[BatchWriter] = None):
+    """
+    Render all handler templates for one tag. Tags are independent, so this runs in a worker thread.
+
+    Args:
+        tag (str): OpenAPI tag name.
+        endpoints (Any): Endpoints belonging to the tag.
+        writer (BatchWriter, optional): Batch the generated files are queued in.
+    """
     print(f"processing tag {tag}")
     #lambda runtime generation by tag
 
-    config_for_tag = next((func for func in merged_lambda_functions if func.get("tag_name") == tag), None)
+    config_for_tag = config_by_tag.get(tag)
 
     if not config_for_tag:
         print("no config found for tag, skipping")
-        continue
+        return
 
     parameters = {
         "endpoints": endpoints,
         **config_for_tag,
     }
 
-    # Abc-Handler
-    process_template(
-        template_name="handler_ABC.py.j2",
-        template_dir="api/devtools/templates/runtime",
-        template_variables=parameters,
-        output_path=Path(config_for_tag.get("runtime_path")) / f"{tag}_ABC.py",
-    )
-
-    # Lambda-Handler
-    process_template(
-        template_name="lambda_handler.py.j2",
-        template_dir="api/devtools/templates/runtime",
-        template_variables=parameters,
-        output_path=Path(config_for_tag.get("runtime_path")) / f"{tag}_lambda_handler.py",
-    )
-
-    # Handler-Implementation prototype
-    process_template(
-        template_name="handler_impl.py.j2",
-        template_dir="api/devtools/templates/runtime",
-        template_variables=parameters,
-        output_path=Path(config_for_tag.get("runtime_path")) / f"{tag}_handler_impl.py",
-    )
+    for template_name, suffix in TEMPLATES:
+        process_template(
+            template_name=template_name,
+            template_dir=TEMPLATE_DIR,
+            template_variables=parameters,
+            output_path=Path(config_for_tag.get("runtime_path")) / f"{tag}{suffix}",
+            writer=writer,
+        )
+
+
+if tags:
+    # the workers queue their files, they are written once all tags rendered (nothing is written if one fails)
+    with BatchWriter() as batch_writer, ThreadPoolExecutor(max_workers=min(8, len(tags))) as executor:
+        # consume the iterator so exceptions from workers are raised here
+        list(executor.map(render_tag, tags.keys(), tags.values(), [batch_writer] * len(tags)))
 
 print_section("All Lambda handlers and implementations have been generated.")
@@ -1,9 +1,27 @@
 """
 Common validation and error reporting utilities for Lost & Found devtools.
 """
-from typing import List
+from copy import deepcopy
+from functools import lru_cache
+from itertools import zip_longest
+import json
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 from importlib import import_module
-from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional, stdlib json is used as fallback
+    orjson = None
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+
+# pydantic is imported on first schema generation, the print helpers are used by scripts that never need it
+
+# json schemas generated during this run, keyed by id(model_class); the class is kept in the value so the id stays valid
+_SCHEMA_CACHE: Dict[int, Tuple[Any, dict]] = {}
+# TypeAdapters for unhashable types, same keying as _SCHEMA_CACHE
+_ADAPTER_BY_ID: Dict[int, Tuple[Any, "TypeAdapter"]] = {}
 
 
 def print_error_list(errors: List[str], max_items: int = 5):
@@ -28,6 +46,12 @@ def import_model_class(import_path):
     """Imports a model class based on the import path."""
     if isinstance(import_path, dict):
         return import_path.get('class')
+    return _import_model_class_from_string(import_path)
+
+
+@lru_cache(maxsize=None)
+def _import_model_class_from_string(import_path: str):
+    """Imports a model class from a 'module:Class' path; cached, as validation and generation resolve the same paths."""
     try:
         modulename, classname = import_path.split(":")
         module = import_module(modulename)
@@ -44,10 +68,7 @@ def check_schema_generation(model_class, model_name, valid_models, validation_is
     """Checks if the model generates a valid Pydantic schema definition."""
 
     try:
-        if isinstance(model_class, type) and issubclass(model_class, BaseModel):
-            model_class.model_json_schema()
-        else:
-            TypeAdapter(model_class).json_schema()
+        _gen_schema(model_class)
         valid_models.append(model_name)
         return True
     except (TypeError, AttributeError, ValueError) as e:
@@ -92,28 +113,83 @@ def print_model_validation_summary(validation_issues, valid_models, response_mod
         print(f"🏷️ Found {len(request_models)} request models with unions/discriminators")
 
 
-def generate_schema_for_model(model_class):
-    """create json schema for a model, Pydantic v2 compatible."""
+@lru_cache(maxsize=None)
+def _cached_adapter(tp) -> "TypeAdapter":
+    """Build the TypeAdapter for a hashable type once."""
+    from pydantic import TypeAdapter  # pylint: disable=import-outside-toplevel
+    return TypeAdapter(tp)
+
+
+def _adapter_for(tp) -> "TypeAdapter":
+    """Return a reusable TypeAdapter for a non-BaseModel type, building its core schema only once."""
+    try:
+        return _cached_adapter(tp)
+    except TypeError:
+        # unhashable generic alias, fall back to an id keyed cache
+        cached = _ADAPTER_BY_ID.get(id(tp))
+        if cached is None:
+            from pydantic import TypeAdapter  # pylint: disable=import-outside-toplevel
+            cached = (tp, TypeAdapter(tp))
+            _ADAPTER_BY_ID[id(tp)] = cached
+        return cached[1]
+
+
+def _gen_schema(model_class) -> dict:
+    """Generate the json schema for a model once per run and return the cached result afterwards."""
+    key = id(model_class)
+    cached = _SCHEMA_CACHE.get(key)
+    if cached is not None:
+        return cached[1]
+    from pydantic import BaseModel  # pylint: disable=import-outside-toplevel
     if isinstance(model_class, type) and issubclass(model_class, BaseModel):
-        return model_class.model_json_schema()
-    return TypeAdapter(model_class).json_schema()
+        schema = model_class.model_json_schema()
+    else:
+        schema = _adapter_for(model_class).json_schema()
+    _SCHEMA_CACHE[key] = (model_class, schema)
+    return schema
+
+
+def generate_schema_for_model(model_class):
+    """create json schema for a model, Pydantic v2 compatible.
+
+    Returns a copy of the cached schema, as callers patch the result in place.
+    """
+    return deepcopy(_gen_schema(model_class))
+
+
+def _def_hash(def_val) -> Optional[int]:
+    """Content hash of a definition (key order independent), None if it cannot be serialized."""
+    try:
+        if orjson is not None:
+            return hash(orjson.dumps(def_val, option=orjson.OPT_SORT_KEYS))  # pylint: disable=no-member
+        return hash(json.dumps(def_val, sort_keys=True, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return None
+
 
+def collect_defs(schema, global_defs, def_hashes: Optional[Dict[str, Optional[int]]] = None):
+    """
+    Adds $defs from the model schema into the global defs dict, checking for conflicts.
 
-def collect_defs(schema, global_defs):
-    """Adds $defs from the model schema into the global defs dict, checking for conflicts."""
+    def_hashes keeps the content hashes of global_defs entries across calls, so known definitions are compared by hash;
+    only differing hashes are confirmed with a deep compare before warning.
+    """
+    if def_hashes is None:
+        def_hashes = {}
     if "$defs" in schema:
         for def_key, def_val in schema["$defs"].items():
             if def_key not in global_defs:
                 global_defs[def_key] = def_val
-            elif global_defs[def_key] != def_val:
+                continue
+            if def_key not in def_hashes:
+                def_hashes[def_key] = _def_hash(global_defs[def_key])
+            known_hash = def_hashes[def_key]
+            if (known_hash is None or _def_hash(def_val) != known_hash) and global_defs[def_key] != def_val:
                 print(f"Warning: Conflicting definition for {def_key}")
         del schema["$defs"]
 
 
 def pretty_print_model_table(processed_models, columns=4):
     """Prints the model names in a tabular format."""
-    for i in range(0, len(processed_models), columns):
-        row = processed_models[i:i + columns]
-        while len(row) < columns:
-            row.append("")
+    for row in zip_longest(*[iter(processed_models)] * columns, fillvalue=""):
         print('\t'.join(f"{name:<{40}}" for name in row))
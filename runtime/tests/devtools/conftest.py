@@ -0,0 +1,8 @@
+"""Make the devtools scripts in api/devtools importable for their tests, the scripts import each other by module name."""
+
+import sys
+from pathlib import Path
+
+DEVTOOLS_DIR = str(Path(__file__).resolve().parents[3] / "api" / "devtools")
+if DEVTOOLS_DIR not in sys.path:
+    sys.path.insert(0, DEVTOOLS_DIR)
@@ -0,0 +1,339 @@
+"""Tests for the devtools helpers: the fused schema patch walk, user code blocks, the batch file writer and the config parse cache."""
+
+import copy
+import os
+from pathlib import Path
+
+import pytest
+
+import helper
+from helper import BatchWriter, Config, extract_user_code_blocks, inject_user_code, patch_schema_all
+
+OWNER_HANDLER_IMPL = Path(__file__).resolve().parents[2] / "owner" / "Owner_handler_impl.py"
+
+
+def test_patch_schema_all_rewrites_refs_and_const():
+    """$defs pointers become component refs in every key, external refs are rewritten, const becomes enum."""
+    schema = {
+        "properties": {
+            "kind": {"const": "owner"},
+            "item": {"$ref": "#/$defs/Item"},
+            "other": {"$ref": "./schemas/other.yaml#/components/schemas/Other"},
+            "local": {"$ref": "#/components/schemas/Local"},
+        },
+        "discriminator": {"mapping": {"item": "#/$defs/Item"}},
+    }
+    assert patch_schema_all(schema) == {
+        "discriminator": {"mapping": {"item": "#/components/schemas/Item"}},
+        "properties": {
+            "item": {"$ref": "#/components/schemas/Item"},
+            "kind": {"enum": ["owner"]},
+            "local": {"$ref": "#/components/schemas/Local"},
+            "other": {"$ref": "#/components/schemas/Other"},
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "any_of",
+    [
+        [{"$ref": "#/$defs/Item"}, {"type": "null"}],
+        [{"type": "null"}, {"$ref": "#/$defs/Item"}],
+    ],
+)
+def test_patch_schema_all_merges_nullable_any_of(any_of):
+    """anyOf with a null schema is merged into the node as the other schema plus nullable."""
+    schema = {"title": "Item", "anyOf": any_of}
+    assert patch_schema_all(schema) == {"$ref": "#/components/schemas/Item", "nullable": True, "title": "Item"}
+
+
+def test_patch_schema_all_replaces_nullable_nodes():
+    """A node that is nullable already becomes the nullable object stub."""
+    schema = {"properties": {"note": {"type": "string", "nullable": True, "items": {"const": 1}}}}
+    assert patch_schema_all(schema) == {"properties": {"note": {"nullable": True, "type": "object"}}}
+
+
+def test_patch_schema_all_does_not_patch_merged_keys_again():
+    """Two-element anyOf lists and keys merged from them are not anyOf-patched further."""
+    inner = {"anyOf": [{"type": "string"}, {"type": "null"}]}
+    schema = {
+        "anyOf": [{"properties": {"x": copy.deepcopy(inner)}}, {"type": "null"}],
+        "pair": {"anyOf": [copy.deepcopy(inner), {"type": "integer"}]},
+    }
+    assert patch_schema_all(schema) == {
+        "nullable": True,
+        "pair": {"anyOf": [inner, {"type": "integer"}]},
+        "properties": {"x": inner},
+    }
+
+
+def test_patch_schema_all_sorted_copy():
+    """The result is a copy with sorted keys at every level, the input is patched in place but keeps its order."""
+    schema = {"b": {"z": [{"y": 1, "x": {"const": 2}}], "a": 1}, "a": "#/$defs/A"}
+    result = patch_schema_all(schema)
+    assert list(result) == ["a", "b"]
+    assert list(result["b"]) == ["a", "z"]
+    assert list(result["b"]["z"][0]) == ["x", "y"]
+    assert list(schema) == ["b", "a"]
+    assert schema["a"] == "#/components/schemas/A"
+    result["b"]["z"][0]["x"]["enum"].append(3)
+    assert schema["b"]["z"][0]["x"] == {"enum": [2]}
+
+
+def test_patch_schema_all_in_place():
+    """Without a sorted copy the input itself is patched and returned."""
+    schema = {"b": {"const": 1}, "a": {"$ref": "#/$defs/A"}}
+    assert patch_schema_all(schema, sorted_copy=False) is schema
+    assert schema == {"b": {"enum": [1]}, "a": {"$ref": "#/components/schemas/A"}}
+    assert list(schema) == ["b", "a"]
+
+
+def test_patch_schema_all_handles_deep_trees():
+    """The walk is iterative, nesting far beyond the recursion limit works."""
+    schema = leaf = {}
+    for _ in range(5000):
+        leaf["items"] = {}
+        leaf = leaf["items"]
+    leaf["$ref"] = "#/$defs/Deep"
+    result = patch_schema_all(schema)
+    for _ in range(5000):
+        result = result["items"]
+    assert result == {"$ref": "#/components/schemas/Deep"}
+
+
+def write_handler(path, text):
+    """Write a handler file as bytes, so line endings are kept exactly as given."""
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def test_extract_user_code_blocks(tmp_path):
+    """Each block is returned with the indent of its BEGIN line and the lines between the markers."""
+    handler = write_handler(tmp_path / "impl.py", (
+        "# -- BEGIN USER CODE: imports --\n"
+        "import os\n"
+        "# -- END USER CODE: imports --\n"
+        "class Handler:\n"
+        "    def get(self):\n"
+        "        # -- BEGIN USER CODE: get --\n"
+        "        value = 1\n"
+        "\n"
+        "        return value\n"
+        "        # -- END USER CODE: get --\n"
+        "        # -- BEGIN USER CODE: empty --\n"
+        "        # -- END USER CODE: empty --\n"
+    ))
+    assert extract_user_code_blocks(handler) == {
+        "imports": ("", "import os\n"),
+        "get": ("        ", "        value = 1\n\n        return value\n"),
+        "empty": ("        ", ""),
+    }
+
+
+def test_extract_user_code_blocks_missing_file(tmp_path):
+    """A handler that was not generated yet has no user code."""
+    assert extract_user_code_blocks(tmp_path / "missing.py") == {}
+
+
+def test_extract_user_code_blocks_nested_markers(tmp_path):
+    """A BEGIN inside an open block restarts it, so only the inner block of nested markers is kept."""
+    handler = write_handler(tmp_path / "impl.py", (
+        "# -- BEGIN USER CODE: outer --\n"
+        "outer = 1\n"
+        "# -- BEGIN USER CODE: inner --\n"
+        "inner = 2\n"
+        "# -- END USER CODE: inner --\n"
+        "after = 3\n"
+        "# -- END USER CODE: outer --\n"
+    ))
+    assert extract_user_code_blocks(handler) == {"inner": ("", "inner = 2\n")}
+
+
+def test_extract_user_code_blocks_mismatched_end(tmp_path):
+    """An END marker of another block does not close the open block, it stays part of the content."""
+    handler = write_handler(tmp_path / "impl.py", (
+        "# -- BEGIN USER CODE: first --\n"
+        "x = 1\n"
+        "# -- END USER CODE: second --\n"
+        "# -- END USER CODE: first --\n"
+    ))
+    assert extract_user_code_blocks(handler) == {"first": ("", "x = 1\n# -- END USER CODE: second --\n")}
+
+
+def test_extract_user_code_blocks_duplicates(tmp_path):
+    """For a block name used twice, the last block wins."""
+    handler = write_handler(tmp_path / "impl.py", (
+        "# -- BEGIN USER CODE: get --\n"
+        "first = 1\n"
+        "# -- END USER CODE: get --\n"
+        "    # -- BEGIN USER CODE: get --\n"
+        "    second = 2\n"
+        "    # -- END USER CODE: get --\n"
+    ))
+    assert extract_user_code_blocks(handler) == {"get": ("    ", "    second = 2\n")}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "# -- BEGIN USER CODE: get --\nvalue = 1\n",
+        "# -- BEGIN USER CODE: get --\nvalue = 1\n# -- END USER CODE: get",
+        "# -- END USER CODE: get --\nvalue = 1\n",
+    ],
+    ids=["no-end", "broken-end", "end-only"],
+)
+def test_extract_user_code_blocks_unterminated(tmp_path, text):
+    """A block without a matching END marker is not extracted."""
+    assert extract_user_code_blocks(write_handler(tmp_path / "impl.py", text)) == {}
+
+
+def test_extract_user_code_blocks_without_final_newline(tmp_path):
+    """An END marker on the last line without a line break still closes the block."""
+    handler = write_handler(tmp_path / "impl.py", "    # -- BEGIN USER CODE: get --\n    pass\n    # -- END USER CODE: get --")
+    assert extract_user_code_blocks(handler) == {"get": ("    ", "    pass\n")}
+
+
+def test_extract_user_code_blocks_crlf(tmp_path):
+    """Files with Windows line endings give the same blocks, with plain newlines."""
+    text = "class Handler:\n    # -- BEGIN USER CODE: get --\n    return 1\n\n    # -- END USER CODE: get --\n"
+    crlf = write_handler(tmp_path / "crlf.py", text.replace("\n", "\r\n"))
+    lf = write_handler(tmp_path / "lf.py", text)
+    assert extract_user_code_blocks(crlf) == extract_user_code_blocks(lf) == {"get": ("    ", "    return 1\n\n")}
+
+
+def test_inject_user_code_replaces_default_blocks():
+    """Blocks still marked as default in the template get the user code, indented like the template block."""
+    rendered = (
+        "class Handler:\n"
+        "    def get(self):\n"
+        "        # -- BEGIN USER CODE: get --\n"
+        "        # DEFAULT USER CODE: TODO\n"
+        "        # -- END USER CODE: get --\n"
+    )
+    result = inject_user_code(rendered, {"get": ("    ", "    if ready:\n      return 1\n\n    return 2\n")})
+    assert result == (
+        "class Handler:\n"
+        "    def get(self):\n"
+        "        # -- BEGIN USER CODE: get --\n"
+        "        if ready:\n"
+        "        return 1\n"
+        "\n"
+        "        return 2\n"
+        "        # -- END USER CODE: get --\n"
+    )
+
+
+def test_inject_user_code_keeps_custom_template_blocks():
+    """A template block without the default marker is left as it is."""
+    rendered = "# -- BEGIN USER CODE: imports --\nimport json\n# -- END USER CODE: imports --\n"
+    assert inject_user_code(rendered, {"imports": ("", "import os\n")}) == rendered
+
+
+def test_inject_user_code_appends_unmatched_blocks():
+    """User code of blocks the template no longer has is appended at the end, so it is not lost."""
+    rendered = "# -- BEGIN USER CODE: get --\n# DEFAULT USER CODE: TODO\n# -- END USER CODE: get --\n"
+    result = inject_user_code(rendered, {"removed": ("    ", "    return 1\n")})
+    assert result == rendered + (
+        "\n\n# --- Unmatched user code blocks from previous version ---\n"
+        "    # -- BEGIN USER CODE: removed --\n"
+        "    return 1\n"
+        "    # -- END USER CODE: removed --\n"
+    )
+
+
+def test_user_code_round_trip_of_existing_handler(tmp_path):
+    """Injecting the blocks of a generated handler into a fresh rendering with default blocks gives the handler back."""
+    original = OWNER_HANDLER_IMPL.read_text(encoding="utf-8")
+    user_blocks = extract_user_code_blocks(OWNER_HANDLER_IMPL)
+    assert {"imports", "owner_get", "owner_onboarding"} <= set(user_blocks)
+    # what the template renders: every block back to its default content
+    rendered = original
+    for name, (indent, user_code) in user_blocks.items():
+        begin, end = f"{indent}# -- BEGIN USER CODE: {name} --\n", f"{indent}# -- END USER CODE: {name} --"
+        rendered = rendered.replace(begin + user_code + end, f"{begin}{indent}# DEFAULT USER CODE: TODO\n{end}")
+    assert rendered != original
+    assert inject_user_code(rendered, user_blocks) == original
+    # and once more through a file with Windows line endings
+    crlf_copy = write_handler(tmp_path / "Owner_handler_impl.py", original.replace("\n", "\r\n"))
+    assert inject_user_code(rendered, extract_user_code_blocks(crlf_copy)) == original
+
+
+def test_batch_writer_writes_on_exit(tmp_path):
+    """Files are written when the block ends, parent directories are created, content is UTF-8 without newline translation."""
+    target = tmp_path / "out" / "nested" / "handler.py"
+    with BatchWriter() as writer:
+        writer.write(target, "line 1\r\nGrüße\n")
+        writer.write(str(tmp_path / "out" / "other.py"), "x = 1\n")
+        assert not target.exists()
+    assert target.read_bytes() == "line 1\r\nGrüße\n".encode("utf-8")
+    assert (tmp_path / "out" / "other.py").read_text(encoding="utf-8") == "x = 1\n"
+
+
+def test_batch_writer_overwrites_existing_files(tmp_path):
+    """An existing file is replaced completely, also by shorter content."""
+    target = tmp_path / "handler.py"
+    target.write_text("a much longer old content\n", encoding="utf-8")
+    with BatchWriter() as writer:
+        writer.write(target, "new\n")
+    assert target.read_text(encoding="utf-8") == "new\n"
+
+
+def test_batch_writer_writes_nothing_on_error(tmp_path):
+    """If the block raises, no file is written and the error is passed on."""
+    target = tmp_path / "handler.py"
+    with pytest.raises(RuntimeError):
+        with BatchWriter() as writer:
+            writer.write(target, "content\n")
+            raise RuntimeError("template failed")
+    assert not target.exists()
+
+
+def write_config(path, text, mtime_ns):
+    """Write a config file with a fixed modification time, so cache keys do not depend on the clock resolution."""
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_config_parse_cache_reuses_unchanged_file(tmp_path):
+    """Loading an unchanged file again reuses the parsed content."""
+    config_file = tmp_path / "config.json5"
+    write_config(config_file, '{"paths": {"schema_file": "schemas.yaml"}}', 1_700_000_000_000_000_000)
+    first = Config.load(str(config_file))
+    second = Config.load(str(config_file))
+    assert first.paths == {"schema_file": "schemas.yaml"}
+    assert second.paths is first.paths
+
+
+def test_config_parse_cache_sees_changes(tmp_path):
+    """A new modification time parses the file again."""
+    config_file = tmp_path / "config.json5"
+    write_config(config_file, '{"paths": {"schema_file": "old.yaml"}}', 1_700_000_000_000_000_000)
+    assert Config.load(str(config_file)).paths == {"schema_file": "old.yaml"}
+    write_config(config_file, '{"paths": {"schema_file": "new.yaml"}}', 1_700_000_001_000_000_000)
+    assert Config.load(str(config_file)).paths == {"schema_file": "new.yaml"}
+
+
+def test_config_parse_falls_back_to_json5(tmp_path):
+    """Files that are not strict JSON are parsed as JSON5."""
+    config_file = tmp_path / "config.json5"
+    write_config(config_file, "{\n  // comment\n  lambdas: {functions: [{tag_name: 'Owner'}, {tag_name: 'Owner', second: true}]},\n}\n", 1_700_000_000_000_000_000)
+    config = Config.load(str(config_file))
+    assert config.get_lambda_function_by_name("Owner") == {"tag_name": "Owner"}
+    assert config.get_lambda_function_by_name("Missing") is None
+
+
+def test_config_load_errors(tmp_path):
+    """A missing file raises FileNotFoundError, an unparsable one ValueError."""
+    with pytest.raises(FileNotFoundError):
+        Config.load(str(tmp_path / "missing.json5"))
+    broken = tmp_path / "broken.json5"
+    write_config(broken, "{ paths: ", 1_700_000_000_000_000_000)
+    with pytest.raises(ValueError):
+        Config.load(str(broken))
+
+
+def test_write_json_file_accepts_integer_keys(tmp_path):
+    """Integer keys from YAML sources are written as strings."""
+    target = tmp_path / "out.json"
+    helper.write_json_file(target, {200: {"b": 1, "a": 2}}, sort_keys=True)
+    assert helper.load_json_file(target) == {"200": {"a": 2, "b": 1}}
@@ -0,0 +1,106 @@
+"""Round-trip tests for the direct YAML writer that produces api/schemas/schemas.yaml."""
+
+import io
+import math
+import random
+
+import pytest
+
+from helper import dump_openapi_yaml, load_yaml
+
+
+def round_trip(data, sort_keys=False):
+    """Write data with dump_openapi_yaml and read it back with the yaml loader."""
+    stream = io.StringIO()
+    dump_openapi_yaml(data, stream, sort_keys=sort_keys)
+    return load_yaml(stream.getvalue())
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        # YAML 1.1 bool/null words and other plain scalars that resolve to non-strings
+        "y", "n", "Yes", "NO", "true", "False", "on", "OFF", "null", "Null", "~", "",
+        "1", "-1", "1.5", "1e3", ".5", "0x1F", "0o17", "017", "1_000", ".inf", "-.Inf", ".nan", "12:30:00", "2025-01-01",
+        # indicators, quotes and whitespace
+        "-", "- item", "? key", ": value", "a: b", "a #b", "#comment", "&anchor", "*alias", "!tag", "%directive", "@at", "`tick",
+        "|", ">", "[list]", "{map}", "it's", "say \"hi\"", "'single'", "\"double\"", "back\\slash",
+        " leading", "trailing ", "tab\there", "line\nbreak", "crlf\r\n", "\n",
+        # non-ASCII, C1 controls and unicode line breaks
+        "Grüße", "日本語", "emoji 🎉", "nel\x85end", "c1\x80\x9f", "del\x7f", "ls\u2028ps\u2029", "\ufeffbom", "nul\x00", "bell\x07",
+        # plain looking text that must stay as it is
+        "#/components/schemas/Owner", "./schemas/x.yaml#/components/schemas/C", "^[a-z]+$", "Unix timestamp (seconds since epoch)",
+    ],
+)
+def test_strings_round_trip(value):
+    """Strings are read back unchanged, as values, keys and list items."""
+    data = {"value": value, value: "key", "items": [value, {"nested": value}]}
+    assert round_trip(data) == data
+
+
+@pytest.mark.parametrize("value", [0.0, -0.0, 1.0, -2.5, 0.1, 1e-05, 1.5e-07, 1e16, 1e20, 2.5e300, 123456789.125, float("inf"), float("-inf")])
+def test_floats_round_trip(value):
+    """Floats are read back as the same float, not as int or str."""
+    result = round_trip({"value": value})["value"]
+    assert isinstance(result, float)
+    assert result == value
+    assert math.copysign(1.0, result) == math.copysign(1.0, value)
+
+
+def test_nan_round_trip():
+    """NaN is written so it is read back as NaN."""
+    result = round_trip({"value": float("nan")})["value"]
+    assert isinstance(result, float) and math.isnan(result)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        [],
+        {"a": {}, "b": [], "c": None, "d": True, "e": False, "f": 0, "g": -12},
+        {"list": [[1, [2, []]], [{}], {"a": [{"b": {"c": [None]}}]}]},
+        [{"a": 1, "b": {"c": 2}}, [{"d": 3}], "e"],
+        {404: {"description": "Not found"}, 200: {"description": "OK"}},
+    ],
+)
+def test_structures_round_trip(data):
+    """Nested and empty containers keep their shape, with and without sorted keys."""
+    assert round_trip(data) == data
+    assert round_trip(data, sort_keys=True) == data
+
+
+def test_sort_keys_orders_mappings():
+    """With sort_keys the keys are written in sorted order at every level."""
+    stream = io.StringIO()
+    dump_openapi_yaml({"b": {"z": 1, "a": 2}, "a": [{"w": 1, "v": 2}]}, stream, sort_keys=True)
+    assert stream.getvalue() == "a:\n- v: 2\n  w: 1\nb:\n  a: 2\n  z: 1\n"
+
+
+def test_indent_round_trip():
+    """Output written with an indent is valid YAML below a parent key."""
+    stream = io.StringIO()
+    stream.write("components:\n  schemas:\n")
+    dump_openapi_yaml({"Owner": {"type": "object", "required": ["id"]}}, stream, indent=4)
+    assert load_yaml(stream.getvalue()) == {"components": {"schemas": {"Owner": {"type": "object", "required": ["id"]}}}}
+
+
+def random_document(rng, depth=0):
+    """Build a random document from the value kinds the generated schemas contain."""
+    alphabet = "aZ09 _-.:#'\"\\/$()[]{}!&*?|>%@`,\t\n\x85\u2028é日"
+    kind = rng.random()
+    if depth < 4 and kind < 0.3:
+        return {rng.choice(["type", "yes", "", "a b", "1", "#x"]) + str(rng.randint(0, 9)): random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if depth < 4 and kind < 0.45:
+        return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if kind < 0.75:
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+    return rng.choice([None, True, False, 0, -7, 2**40, 0.5, -1e-9, 3e25, "null", "No", "~", "-", "0x10"])
+
+
+def test_random_documents_round_trip():
+    """Random documents are read back unchanged."""
+    rng = random.Random(20250101)
+    for _ in range(2000):
+        data = {"root": random_document(rng)}
+        assert round_trip(data, sort_keys=True) == data
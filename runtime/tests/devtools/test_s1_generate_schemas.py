@@ -0,0 +1,144 @@
+"""Tests for the schema manifest check and the scan failure cache of the schema generator."""
+
+import json
+import os
+import sys
+
+import pytest
+
+from s1_generate_schemas import schema_file_is_up_to_date, scan_directory_for_models, write_schema_manifest
+
+
+@pytest.fixture
+def schema_inputs(tmp_path):
+    """Create a model directory and a generated schema file with its JSON copy, return (schema_file, input_dir)."""
+    input_dir = tmp_path / "models"
+    input_dir.mkdir()
+    (input_dir / "owner.py").write_text("class Owner:\n    pass\n", encoding="utf-8")
+    schema_file = tmp_path / "schemas" / "schemas.yaml"
+    schema_file.parent.mkdir()
+    schema_file.write_text("components: {}\n", encoding="utf-8")
+    schema_file.with_suffix(".json").write_text("{}", encoding="utf-8")
+    return schema_file, input_dir
+
+
+def test_schema_without_manifest_is_not_up_to_date(schema_inputs):
+    """Without a manifest the schema file always counts as outdated."""
+    assert not schema_file_is_up_to_date(*schema_inputs)
+
+
+def test_schema_with_manifest_is_up_to_date(schema_inputs):
+    """Right after writing the manifest nothing changed."""
+    write_schema_manifest(*schema_inputs)
+    assert schema_file_is_up_to_date(*schema_inputs)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda schema_file, input_dir: (input_dir / "owner.py").write_text("class Owner:\n    name: str\n", encoding="utf-8"),
+        lambda schema_file, input_dir: (input_dir / "finder.py").write_text("class Finder:\n    pass\n", encoding="utf-8"),
+        lambda schema_file, input_dir: (input_dir / "owner.py").unlink(),
+        lambda schema_file, input_dir: (input_dir / "owner.py").rename(input_dir / "owner_model.py"),
+        lambda schema_file, input_dir: os.utime(input_dir / "owner.py", ns=(0, 1_000_000_000)),
+        lambda schema_file, input_dir: schema_file.write_text("components: {schemas: {}}\n", encoding="utf-8"),
+        lambda schema_file, input_dir: schema_file.with_suffix(".json").unlink(),
+    ],
+    ids=["changed", "added", "deleted", "moved", "touched", "schema-edited", "json-deleted"],
+)
+def test_schema_manifest_detects_changes(schema_inputs, change):
+    """Changed, added, deleted or moved model files and changed outputs make the schema outdated."""
+    write_schema_manifest(*schema_inputs)
+    change(*schema_inputs)
+    assert not schema_file_is_up_to_date(*schema_inputs)
+
+
+def test_schema_manifest_detects_other_pydantic_version(schema_inputs):
+    """A manifest from another pydantic version is outdated."""
+    schema_file, input_dir = schema_inputs
+    write_schema_manifest(schema_file, input_dir)
+    manifest_file = schema_file.with_name("schemas.yaml.manifest.json")
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    manifest["pydantic"] = "0.0.1"
+    manifest_file.write_text(json.dumps(manifest), encoding="utf-8")
+    assert not schema_file_is_up_to_date(schema_file, input_dir)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A model directory with a good file, a file with a syntax error and a file with a missing dependency.
+
+    Module names are made unique per test, so files imported by one test are not found in sys.modules by another.
+    """
+    suffix = tmp_path.name.replace("-", "_")
+    directory = tmp_path / f"scan_models_{suffix}"
+    directory.mkdir()
+    names = {"good": f"good_{suffix}", "broken": f"broken_{suffix}", "missing": f"missing_{suffix}"}
+    (directory / f"{names['good']}.py").write_text("VALUE = 1\n", encoding="utf-8")
+    (directory / f"{names['broken']}.py").write_text("def broken(:\n", encoding="utf-8")
+    (directory / f"{names['missing']}.py").write_text("import not_installed_package_for_scan_test\n", encoding="utf-8")
+    before = set(sys.modules)
+    yield directory, names
+    for name in set(sys.modules) - before:
+        del sys.modules[name]
+
+
+def scan(directory, cache_file):
+    """Scan directory with the failure cache and return the names of the imported modules."""
+    return sorted(path.stem for path in scan_directory_for_models(str(directory), recursive=True, failure_cache=cache_file))
+
+
+def test_scan_remembers_failing_files(model_dir, tmp_path, capsys):
+    """Files failing with a syntax error are stored and skipped on the next scan while unchanged."""
+    directory, names = model_dir
+    cache_file = tmp_path / "cache" / "scan_failures.json"
+    assert scan(directory, cache_file) == [names["good"]]
+    failures = json.loads(cache_file.read_text(encoding="utf-8"))
+    assert list(failures) == [str(directory / f"{names['broken']}.py")]
+    assert failures[str(directory / f"{names['broken']}.py")][2].startswith("SyntaxError")
+    capsys.readouterr()
+
+    assert scan(directory, cache_file) == [names["good"]]
+    output = capsys.readouterr().out
+    assert f"Skipping {names['broken']}.py" in output
+    assert f"Could not import {names['broken']}.py" not in output
+
+
+def test_scan_does_not_remember_import_errors(model_dir, tmp_path, capsys):
+    """Import errors are tried again on every scan, installing a package changes no scanned file."""
+    directory, names = model_dir
+    cache_file = tmp_path / "scan_failures.json"
+    scan(directory, cache_file)
+    assert str(directory / f"{names['missing']}.py") not in json.loads(cache_file.read_text(encoding="utf-8"))
+    capsys.readouterr()
+    scan(directory, cache_file)
+    assert f"Could not import {names['missing']}.py: ModuleNotFoundError" in capsys.readouterr().out
+
+
+def test_scan_retries_fixed_files(model_dir, tmp_path):
+    """A failing file that was changed is imported again and dropped from the cache."""
+    directory, names = model_dir
+    cache_file = tmp_path / "scan_failures.json"
+    scan(directory, cache_file)
+    (directory / f"{names['broken']}.py").write_text("def fixed():\n    return 1\n", encoding="utf-8")
+    assert scan(directory, cache_file) == sorted([names["good"], names["broken"]])
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == {}
+
+
+def test_scan_ignores_cache_older_than_scanned_files(model_dir, tmp_path, capsys):
+    """A failure can depend on other files, so the cache is not used once any scanned file is newer."""
+    directory, names = model_dir
+    cache_file = tmp_path / "scan_failures.json"
+    scan(directory, cache_file)
+    cache_mtime = cache_file.stat().st_mtime_ns
+    os.utime(directory / f"{names['good']}.py", ns=(cache_mtime, cache_mtime + 1_000_000_000))
+    capsys.readouterr()
+    scan(directory, cache_file)
+    assert f"Could not import {names['broken']}.py: SyntaxError" in capsys.readouterr().out
+
+
+def test_scan_without_cache(model_dir, tmp_path):
+    """Without a failure cache every file is tried and nothing is written."""
+    directory, names = model_dir
+    assert scan(directory, None) == [names["good"]]
+    assert not list(tmp_path.glob("*.json"))
@@ -0,0 +1,146 @@
+"""Tests for the shared spec walk and the tag cache of the OpenAPI combine step."""
+
+import json
+import os
+from collections import defaultdict
+
+import pytest
+
+import s2_generate_api
+from s2_generate_api import collect_spec_refs, load_openapi_by_tag_cached, validate_schema_references
+
+
+def example_spec():
+    """Return a small spec with refs in operations, in components, in lists and behind an integer status code."""
+    return {
+        "paths": {
+            "/owners": {
+                "get": {"responses": {200: {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Owner"}}}}}},
+                "post": {
+                    "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/NewOwner"}}}},
+                    "responses": {"201": {"$ref": "#/components/responses/Created"}},
+                },
+            },
+            "/broken": "not a path item",
+        },
+        "components": {
+            "schemas": {
+                "Owner": {
+                    "properties": {"items": {"type": "array", "items": [{"$ref": "#/components/schemas/A"}]}},
+                    "$ref": "#/components/schemas/B",
+                },
+            },
+        },
+    }
+
+
+def test_collect_spec_refs_reports_refs_in_document_order():
+    """All refs are collected once, in document order; a node's own $ref comes after refs in earlier siblings."""
+    refs = [ref for ref, _ in collect_spec_refs(example_spec())["refs"]]
+    assert refs == [
+        "#/components/schemas/Owner",
+        "#/components/schemas/NewOwner",
+        "#/components/responses/Created",
+        "#/components/schemas/A",
+        "#/components/schemas/B",
+    ]
+
+
+def test_collect_spec_refs_groups_operation_refs():
+    """Request and response refs are kept per operation, invalid path items are listed."""
+    spec_refs = collect_spec_refs(example_spec())
+    assert spec_refs["invalid_paths"] == ["/broken"]
+    get_refs = spec_refs["operations"][("/owners", "get")]
+    assert get_refs["requestBody"] is None
+    assert set(get_refs["responses"][200]) == {"#/components/schemas/Owner"}
+    post_refs = spec_refs["operations"][("/owners", "post")]
+    assert set(post_refs["requestBody"]) == {"#/components/schemas/NewOwner"}
+    assert post_refs["responses"] == {"201": ["#/components/responses/Created"]}
+
+
+def test_missing_ref_paths_tell_list_indices_from_integer_keys(capsys):
+    """Missing refs are reported with their path, list indices as [i] and integer keys as plain keys."""
+    spec = example_spec()
+    spec["paths"]["/owners"]["get"]["responses"][200]["content"]["application/json"]["schema"]["$ref"] = "#/components/schemas/Gone"
+    report = validate_schema_references(spec)
+    capsys.readouterr()
+    assert [item["path"] for item in report["missing_refs"]] == [
+        "paths./owners.get.responses.200.content.application/json.schema.$ref",
+        "paths./owners.post.requestBody.content.application/json.schema.$ref",
+        "components.schemas.Owner.properties.items.items[0].$ref",
+        "components.schemas.Owner.$ref",
+    ]
+    assert report["total_refs_checked"] == 5
+    assert report["invalid_paths"] == ["/broken"]
+
+
+@pytest.fixture
+def counting_loader(monkeypatch):
+    """Replace the Prance based loader with one that returns fixed tags and counts its calls."""
+    calls = []
+    result = {"owner": [{"path": "/owners", "method": "GET", "responses": {"200": {"description": "OK"}}}]}
+
+    def fake_load(filename):
+        calls.append(filename)
+        return defaultdict(list, json.loads(json.dumps(result)))
+
+    monkeypatch.setattr(s2_generate_api, "load_openapi_by_tag", fake_load)
+    return calls, result
+
+
+def test_tag_cache_is_used_while_file_is_unchanged(tmp_path, counting_loader):
+    """The second call for an unchanged file is served from the cache file without parsing."""
+    calls, result = counting_loader
+    spec_file = tmp_path / "api.json"
+    spec_file.write_text("{}", encoding="utf-8")
+    assert load_openapi_by_tag_cached(str(spec_file)) == result
+    assert (tmp_path / "api.json.tags.cache.json").exists()
+    cached = load_openapi_by_tag_cached(str(spec_file))
+    assert cached == result
+    assert isinstance(cached, defaultdict)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("change", ["content", "mtime"])
+def test_tag_cache_is_invalidated_by_file_changes(tmp_path, counting_loader, change):
+    """A changed size or modification time makes the next call parse the file again."""
+    calls, _ = counting_loader
+    spec_file = tmp_path / "api.json"
+    spec_file.write_text("{}", encoding="utf-8")
+    load_openapi_by_tag_cached(str(spec_file))
+    if change == "content":
+        spec_file.write_text('{"paths": {}}', encoding="utf-8")
+    else:
+        stat = spec_file.stat()
+        os.utime(spec_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    load_openapi_by_tag_cached(str(spec_file))
+    load_openapi_by_tag_cached(str(spec_file))
+    assert len(calls) == 2
+
+
+def test_tag_cache_ignores_unreadable_cache(tmp_path, counting_loader):
+    """A broken cache file is parsed around and replaced."""
+    calls, result = counting_loader
+    spec_file = tmp_path / "api.json"
+    spec_file.write_text("{}", encoding="utf-8")
+    (tmp_path / "api.json.tags.cache.json").write_text("[not json", encoding="utf-8")
+    assert load_openapi_by_tag_cached(str(spec_file)) == result
+    assert load_openapi_by_tag_cached(str(spec_file)) == result
+    assert len(calls) == 1
+
+
+def test_tag_cache_skips_results_json_would_change(tmp_path, monkeypatch):
+    """Integer status codes would come back from JSON as strings, so such results are not cached."""
+    calls = []
+
+    def fake_load(filename):
+        calls.append(filename)
+        return defaultdict(list, {"owner": [{"responses": {200: {"description": "OK"}}}]})
+
+    monkeypatch.setattr(s2_generate_api, "load_openapi_by_tag", fake_load)
+    spec_file = tmp_path / "api.yaml"
+    spec_file.write_text("paths: {}\n", encoding="utf-8")
+    assert load_openapi_by_tag_cached(str(spec_file))["owner"][0]["responses"] == {200: {"description": "OK"}}
+    assert not (tmp_path / "api.yaml.tags.cache.json").exists()
+    load_openapi_by_tag_cached(str(spec_file))
+    assert len(calls) == 2